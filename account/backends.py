@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class PortfolioModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the customer's portfolio in the same query as
+    the user, so ``request.user.portfolio`` and ``request.portfolio`` cost
+    nothing extra per request. KYC checks read ``portfolio.kyc_status``.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = (
+                UserModel._default_manager
+                .select_related('portfolio')
+                .get(pk=user_id)
+            )
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,154 @@
+"""
+Background processing of KYC uploads.
+
+Customers upload ID documents and proofs of address at full camera
+resolution. ``process_pending_kyc_images`` (``manage.py
+process_kyc_images`` or the ``process-kyc-images`` cron job) replaces
+each upload with an upright, EXIF-free JPEG no larger than
+KYC_IMAGE_MAX_DIMENSION, stores a KYC_THUMBNAIL_SIZE thumbnail next to
+it for the staff review queue, and deletes the original.
+
+Only uploads without a thumbnail are processed: a resubmission clears
+the thumbnail of each replaced upload (``queue_resubmitted_images``), so
+staff never see the previous document's thumbnail and an upload that has
+already been re-encoded is not re-encoded again.
+
+Images are rendered and uploaded outside any transaction. The new names
+are then written with a conditional UPDATE that only matches if the
+record still points at the files that were processed, so a customer
+re-submitting meanwhile is never overwritten; the orphaned renders are
+deleted instead.
+"""
+import logging
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from base.images import delete_files, render_variants, store_variants
+from .models import KYC
+
+logger = logging.getLogger(__name__)
+
+# upload field -> thumbnail field
+IMAGE_FIELDS = {
+    "document_image": "document_thumbnail",
+    "address_proof": "address_proof_thumbnail",
+}
+
+
+def _render(field_file):
+    max_dimension = getattr(settings, 'KYC_IMAGE_MAX_DIMENSION', 2000)
+    thumbnail_size = getattr(settings, 'KYC_THUMBNAIL_SIZE', 480)
+
+    with field_file.open("rb") as source:
+        variants = render_variants(
+            source,
+            {"full": max_dimension, "thumb": thumbnail_size},
+            quality=getattr(settings, 'KYC_IMAGE_QUALITY', 85),
+        )
+
+    full_field = field_file.field
+    return store_variants(field_file, variants, {
+        "full": full_field,
+        "thumb": KYC._meta.get_field(IMAGE_FIELDS[full_field.name]),
+    })
+
+
+def queue_resubmitted_images(kyc, field_names):
+    """
+    Mark the replaced uploads in ``field_names`` for processing. Call
+    before saving ``kyc``; the stale thumbnails are deleted once the
+    new uploads are committed.
+    """
+    stale = []
+    for field_name in field_names:
+        thumb_field = IMAGE_FIELDS[field_name]
+        thumb = getattr(kyc, thumb_field)
+        if thumb:
+            stale.append(thumb.name)
+        setattr(kyc, thumb_field, None)
+    kyc.images_processed_at = None
+
+    if stale:
+        storage = KYC._meta.get_field("document_thumbnail").storage
+        transaction.on_commit(lambda: delete_files(storage, stale))
+
+
+def process_kyc_images(kyc):
+    """
+    Process one KYC record's unprocessed uploads. Returns True if the
+    record was updated, False if it changed while the images were being
+    rendered.
+    """
+    originals = {}
+    updates = {}
+    storage = None
+    # only match the record if it still has exactly these uploads
+    unchanged = Q(pk=kyc.pk, images_processed_at__isnull=True)
+
+    try:
+        for field_name, thumb_field in IMAGE_FIELDS.items():
+            field_file = getattr(kyc, field_name)
+            if not field_file:
+                unchanged &= Q(**{f"{field_name}__isnull": True}) | Q(**{field_name: ""})
+                continue
+            unchanged &= Q(**{field_name: field_file.name})
+            if getattr(kyc, thumb_field):
+                # already processed
+                continue
+            storage = field_file.storage
+            originals[field_name] = field_file.name
+            try:
+                updates.update(_render(field_file))
+            except (UnidentifiedImageError, Image.DecompressionBombError):
+                # not something we can shrink; keep the upload as it is
+                logger.warning("KYC %s: %s is not a usable image", kyc.pk, field_name)
+
+        updated = KYC.objects.filter(unchanged).update(
+            images_processed_at=timezone.now(), **updates
+        )
+    except Exception:
+        # renders already uploaded for this record would be orphaned
+        delete_files(storage, updates.values())
+        raise
+
+    if not updated:
+        delete_files(storage, updates.values())
+        return False
+
+    # the uploads that were re-encoded
+    delete_files(storage, [originals[name] for name in originals if name in updates])
+    return True
+
+
+def process_pending_kyc_images(batch_size=None):
+    """
+    Process up to ``batch_size`` unprocessed KYC records, oldest first.
+    Returns ``{"processed": n, "skipped": n, "failed": n}``.
+    """
+    batch_size = batch_size or getattr(settings, 'KYC_IMAGE_BATCH_SIZE', 20)
+    totals = {"processed": 0, "skipped": 0, "failed": 0}
+
+    pending = (
+        KYC.objects
+        .filter(images_processed_at__isnull=True)
+        .order_by('updated_at')[:batch_size]
+    )
+    for kyc in pending:
+        try:
+            if process_kyc_images(kyc):
+                totals["processed"] += 1
+            else:
+                totals["skipped"] += 1
+        except Exception:
+            # left unprocessed, at the back of the queue
+            print(f"\nKYC IMAGE ERROR (kyc {kyc.pk}):")
+            traceback.print_exc()
+            KYC.objects.filter(pk=kyc.pk).update(updated_at=timezone.now())
+            totals["failed"] += 1
+
+    return totals
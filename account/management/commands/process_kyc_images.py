@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from account.kyc_images import process_pending_kyc_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Downscale KYC uploads, strip their metadata and generate review "
+        "thumbnails for records not processed yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Keep going until every pending record is processed (backfill).",
+        )
+
+    def handle(self, *args, **options):
+        totals = {"processed": 0, "skipped": 0, "failed": 0}
+
+        while True:
+            result = process_pending_kyc_images(batch_size=options["batch_size"])
+            for key in totals:
+                totals[key] += result[key]
+            # failed records are retried on the next scheduled run
+            if not options["all"] or not (result["processed"] or result["skipped"]):
+                break
+
+        self.stdout.write(
+            f"Processed {totals['processed']} KYC records "
+            f"({totals['skipped']} changed meanwhile, {totals['failed']} failed)"
+        )
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-19 12:21
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0006_alter_user_otp_enabled'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='user_email_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('full_name'), name='user_full_name_upper_idx'),
+        ),
+    ]
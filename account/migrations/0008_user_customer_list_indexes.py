@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-19 12:33
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0007_user_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('country'), name='user_country_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_staff', '-date_joined', '-id'], name='user_staff_joined_idx'),
+        ),
+    ]
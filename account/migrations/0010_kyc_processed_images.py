@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-19 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0009_user_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kyc',
+            name='address_proof_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='kyc/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='kyc',
+            name='document_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='kyc/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='kyc',
+            name='images_processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='kyc',
+            index=models.Index(condition=models.Q(('images_processed_at__isnull', True)), fields=['updated_at'], name='kyc_images_pending_idx'),
+        ),
+    ]
@@ -2,7 +2,8 @@ from django.db import models
 
 # Create your models here.
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django_countries.fields import CountryField
 
@@ -33,12 +34,24 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
 
     date_joined = models.DateTimeField(default=timezone.now)
+    # set when a CustomerDeletionJob is queued; the row goes once it finishes
+    deleted_at = models.DateTimeField(null=True, blank=True)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['full_name']
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [
+            # staff portfolio search (case-insensitive prefix match)
+            models.Index(Upper('email'), name='user_email_upper_idx'),
+            models.Index(Upper('full_name'), name='user_full_name_upper_idx'),
+            models.Index(Upper('country'), name='user_country_upper_idx'),
+            # staff customer list, newest first
+            models.Index(fields=['is_staff', '-date_joined', '-id'], name='user_staff_joined_idx'),
+        ]
+
     def __str__(self):
         return self.email
     
@@ -137,6 +150,22 @@ class KYC(models.Model):
         blank=True
     )
 
+    # --------------------
+    # Processed images (account/kyc_images.py)
+    # --------------------
+    document_thumbnail = models.ImageField(
+        upload_to='kyc/thumbnails/',
+        null=True,
+        blank=True
+    )
+    address_proof_thumbnail = models.ImageField(
+        upload_to='kyc/thumbnails/',
+        null=True,
+        blank=True
+    )
+    # None until the uploads above have been downscaled and thumbnailed
+    images_processed_at = models.DateTimeField(null=True, blank=True)
+
     # --------------------
     # KYC Status
     # --------------------
@@ -153,12 +182,47 @@ class KYC(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # image processing queue
+            models.Index(
+                fields=['updated_at'],
+                name='kyc_images_pending_idx',
+                condition=models.Q(images_processed_at__isnull=True),
+            ),
+        ]
+
     # --------------------
     # Helpers
     # --------------------
     def __str__(self):
         return f"KYC ({self.get_status_display()}) - {self.portfolio.user.email}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.status
+        return instance
+
+    def _sync_portfolio_status(self, status):
+        type(self.portfolio).objects.filter(pk=self.portfolio_id).update(kyc_status=status)
+        if type(self).portfolio.is_cached(self):
+            self.portfolio.kyc_status = status
+
+    def save(self, *args, **kwargs):
+        # Portfolio.kyc_status mirrors status so KYC checks need no join
+        status_changed = self.status != getattr(self, '_loaded_status', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if status_changed:
+                self._sync_portfolio_status(self.status)
+        self._loaded_status = self.status
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self._sync_portfolio_status(self.STATUS_NOT_SUBMITTED)
+            return super().delete(*args, **kwargs)
+
     @property
     def is_verified(self):
         return self.status == self.STATUS_VERIFIED
\ No newline at end of file
@@ -2,10 +2,12 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.urls import reverse
 from datetime import datetime
 import traceback
 
-from notification.email_utils import send_html_email
+from notification.digest import notify_admin
+from notification.models import AdminEvent
 
 User = get_user_model()
 
@@ -16,9 +18,12 @@ def notify_admin_new_user(sender, instance, created, **kwargs):
         return
 
     try:
-        send_html_email(
+        notify_admin(
+            AdminEvent.NEW_USER,
+            summary=f"New registration: {instance.full_name} ({instance.email})",
+            url=reverse('staff:admin_customer_detail', args=[instance.pk]),
+            user=instance,
             subject="New user registration",
-            to_email=[settings.ADMIN_EMAIL],
             # to_email=[admin[1] for admin in settings.ADMINS],  # ("Name", "email")
             template_name="notification/emails/admin_new_user.html",
             context={
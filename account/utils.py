@@ -1,6 +1,9 @@
+from base.db import atomic_retry
 from .models import VIPRequest
 
-def approve_vip_request(vip_request):
+@atomic_retry
+def approve_vip_request(vip_request_id):
+    vip_request = VIPRequest.objects.select_for_update().select_related('user').get(pk=vip_request_id)
     if vip_request.status != VIPRequest.PENDING:
         return False  # can't approve non-pending request
     vip_request.status = VIPRequest.APPROVED
@@ -12,7 +15,9 @@ def approve_vip_request(vip_request):
     return True
 
 
-def reject_vip_request(vip_request, note=None):
+@atomic_retry
+def reject_vip_request(vip_request_id, note=None):
+    vip_request = VIPRequest.objects.select_for_update().get(pk=vip_request_id)
     if vip_request.status != VIPRequest.PENDING:
         return False  # can't reject non-pending request
     vip_request.status = VIPRequest.REJECTED
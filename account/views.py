@@ -17,11 +17,13 @@ import traceback
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.utils.decorators import method_decorator
 
 from .forms import UserRegistrationForm, BootstrapLoginForm
-from notification.email_utils import send_html_email
+from notification.outbox import queue_html_email
 from account.models import User
 from otp.utils import create_otp
+from base.ratelimit import ratelimit
 
 def register_view(request):
     if request.method == 'POST':
@@ -42,7 +44,7 @@ def register_view(request):
             verification_url = f"{protocol}://{current_site.domain}{reverse('account:verify_email', kwargs={'uidb64': uid, 'token': token})}"
 
             try:
-                send_html_email(
+                queue_html_email(
                     subject="Verify your email address",
                     to_email=[user.email],
                     template_name="notification/emails/verify_email.html",
@@ -52,6 +54,7 @@ def register_view(request):
                         "site_name": settings.SITE_NAME,
                         "year": datetime.now().year,
                     },
+                    send_now=True,
                 )
             except Exception as e:
                 # Email not configured yet — print link for manual testing
@@ -109,6 +112,9 @@ def verify_email(request, uidb64, token):
     return redirect('account:login')
 
 
+# per client and per account, to slow down credential stuffing
+@method_decorator(ratelimit(key="ip", rate="20/10m", group="login", redirect_to="account:login"), name="dispatch")
+@method_decorator(ratelimit(key="post:username", rate="5/10m", group="login", redirect_to="account:login"), name="dispatch")
 class EmailLoginView(LoginView):
     template_name = 'frontend/auth/login.html'
     authentication_form = BootstrapLoginForm
@@ -142,7 +148,7 @@ class EmailLoginView(LoginView):
 
             # Send OTP
             try:
-                send_html_email(
+                queue_html_email(
                     subject="Your Login OTP",
                     to_email=[user.email],
                     template_name="notification/emails/login_otp.html",
@@ -152,6 +158,7 @@ class EmailLoginView(LoginView):
                         "site_name": settings.SITE_NAME,
                         "year": datetime.now().year,
                     },
+                    send_now=True,
                 )
                 messages.success(self.request, "An OTP has been sent to your email.")
             except Exception:
@@ -208,7 +215,7 @@ def resend_verification_view(request):
         verification_url = f"{protocol}://{current_site.domain}{reverse('account:verify_email', kwargs={'uidb64': uid, 'token': token})}"
 
         try:
-            send_html_email(
+            queue_html_email(
                 subject="Verify your email address",
                 to_email=[user.email],
                 template_name="notification/emails/verify_email.html",
@@ -218,6 +225,7 @@ def resend_verification_view(request):
                     "site_name": settings.SITE_NAME,
                     "year": datetime.now().year,
                     },
+                send_now=True,
             )
             messages.success(request, "Verification email sent. Check your inbox.")
         except Exception as e:
@@ -270,7 +278,7 @@ def forgot_password(request):
             )
 
             try:
-                send_html_email(
+                queue_html_email(
                     subject="Reset your password",
                     to_email=[user.email],
                     template_name="notification/emails/password_reset.html",
@@ -280,6 +288,7 @@ def forgot_password(request):
                         "site_name": settings.SITE_NAME,
                         "year": datetime.now().year,
                     },
+                    send_now=True,
                 )
 
                 messages.success(
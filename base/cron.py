@@ -0,0 +1,53 @@
+"""
+HTTP entry points for scheduled jobs.
+
+Vercel Cron calls ``/cron/<job_name>/`` on the schedule in vercel.json and
+sends ``Authorization: Bearer $CRON_SECRET``. Jobs are registered in
+``CRON_JOBS`` by dotted path so this module does not import the apps.
+"""
+import traceback
+
+from django.conf import settings
+from django.http import Http404, HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_GET
+
+CRON_JOBS = {
+    "dispatch-emails": "notification.outbox.dispatch_outbox",
+    "admin-digest": "notification.digest.send_admin_digest",
+    "purge-idempotency-keys": "transaction.idempotency.purge_expired_keys",
+    "purge-otps": "otp.utils.purge_expired_otps",
+    "refresh-rollups": "staff.analytics.refresh_rollups",
+    "delete-customers": "staff.deletion.run_deletion_jobs",
+    "process-kyc-images": "account.kyc_images.process_pending_kyc_images",
+    "process-profile-images": "customer.profile_images.process_pending_profile_images",
+}
+
+
+def _authorized(request):
+    secret = getattr(settings, "CRON_SECRET", None)
+    if not secret:
+        return False
+    return constant_time_compare(
+        request.headers.get("Authorization", ""),
+        f"Bearer {secret}",
+    )
+
+
+@require_GET
+def cron_view(request, job_name):
+    if not _authorized(request):
+        return HttpResponseForbidden("Invalid cron secret.")
+
+    if job_name not in CRON_JOBS:
+        raise Http404("Unknown cron job.")
+
+    try:
+        result = import_string(CRON_JOBS[job_name])()
+    except Exception as e:
+        print(f"\nCRON JOB {job_name} FAILED:")
+        traceback.print_exc()
+        return JsonResponse({"job": job_name, "error": str(e)}, status=500)
+
+    return JsonResponse({"job": job_name, "result": result})
@@ -0,0 +1,144 @@
+"""
+Database helpers shared by the apps.
+
+CockroachDB runs every transaction at SERIALIZABLE isolation and, under
+contention, aborts one of the conflicting transactions with SQLSTATE 40001
+("restart transaction"). The client is expected to retry it, which is what
+``atomic_retry`` does.
+"""
+import logging
+import random
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+SERIALIZATION_FAILURE = "40001"
+RESTART_SAVEPOINT = "cockroach_restart"
+
+_stats_lock = threading.Lock()
+_retry_stats = {}
+
+
+def is_retryable_error(exc):
+    """
+    Return True if ``exc`` (or the driver error it wraps) is a
+    serialization failure the transaction can be retried after.
+    """
+    while exc is not None:
+        if getattr(exc, "pgcode", None) == SERIALIZATION_FAILURE:
+            return True
+        exc = exc.__cause__
+    return False
+
+
+def get_retry_stats():
+    """
+    Per-function retry counters for this process:
+    ``{"app.services.fn": {"calls": .., "retries": .., "exhausted": ..}}``
+    """
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _retry_stats.items()}
+
+
+def _record(name, counter):
+    with _stats_lock:
+        stats = _retry_stats.setdefault(
+            name, {"calls": 0, "retries": 0, "exhausted": 0}
+        )
+        stats[counter] += 1
+
+
+def _backoff_delay(attempt):
+    """Exponential backoff with full jitter."""
+    base = getattr(settings, "DB_RETRY_BASE_DELAY", 0.05)
+    cap = getattr(settings, "DB_RETRY_MAX_DELAY", 1.0)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _savepoint(connection, statement):
+    with connection.cursor() as cursor:
+        cursor.execute(f"{statement} {RESTART_SAVEPOINT}")
+
+
+def atomic_retry(func=None, *, using=None, max_attempts=None):
+    """
+    Like ``transaction.atomic`` but retries the whole function when the
+    database reports a serialization failure.
+
+    Uses CockroachDB's client-side retry protocol: the body runs after
+    ``SAVEPOINT cockroach_restart`` and a failed attempt rolls back to it,
+    so the retried transaction keeps its priority instead of starting over.
+
+    When called inside an existing atomic block the function simply runs
+    in a nested ``atomic``; the outermost ``atomic_retry`` owns the retry.
+    The decorated function must be safe to re-run: re-read and lock rows
+    inside it rather than relying on instances passed in by the caller.
+
+    Usage::
+
+        @atomic_retry
+        def approve_deposit(transaction_id): ...
+
+        @atomic_retry(max_attempts=10)
+        def create_snapshot(...): ...
+    """
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            alias = using or DEFAULT_DB_ALIAS
+            connection = connections[alias]
+
+            if connection.in_atomic_block:
+                with transaction.atomic(using=alias):
+                    return fn(*args, **kwargs)
+
+            attempts = max_attempts or getattr(settings, "DB_RETRY_MAX_ATTEMPTS", 5)
+            _record(name, "calls")
+
+            with transaction.atomic(using=alias):
+                # issued once; each failed attempt rolls back to it and
+                # the successful one releases it
+                _savepoint(connection, "SAVEPOINT")
+                for attempt in range(1, attempts + 1):
+                    try:
+                        result = fn(*args, **kwargs)
+                        # CockroachDB reports commit-time conflicts here.
+                        _savepoint(connection, "RELEASE SAVEPOINT")
+                        return result
+                    except OperationalError as exc:
+                        if not is_retryable_error(exc):
+                            raise
+                        if attempt == attempts:
+                            _record(name, "exhausted")
+                            logger.error(
+                                "%s: giving up after %s attempts: %s",
+                                name, attempts, exc,
+                            )
+                            raise
+
+                        # Nested atomic blocks may have flagged the
+                        # transaction as broken; the restart savepoint
+                        # rollback below is what repairs it.
+                        transaction.set_rollback(False, using=alias)
+                        _savepoint(connection, "ROLLBACK TO SAVEPOINT")
+                        _record(name, "retries")
+
+                        delay = _backoff_delay(attempt)
+                        logger.warning(
+                            "%s: serialization failure (attempt %s/%s), retrying in %.3fs",
+                            name, attempt, attempts, delay,
+                        )
+                        time.sleep(delay)
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,116 @@
+"""
+Pillow helpers for processing uploaded images off the request path.
+
+``render_variants`` decodes an upload once and produces any number of
+downscaled copies. Every copy is rotated upright according to its EXIF
+orientation and re-encoded without the original metadata (camera, GPS,
+timestamps), so what is stored is only the pixels::
+
+    variants = render_variants(upload, {"full": 2000, "thumb": 480})
+    storage.save("kyc/documents/id.jpg", variants["full"])
+
+Sizes are the maximum width/height in pixels; images are never scaled up.
+``square=True`` centre-crops first, for avatars shown in a square frame.
+
+``store_variants`` saves the renders next to the upload through the
+model fields they belong to, and ``delete_files`` cleans up renders that
+were superseded or never got written to the database.
+"""
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+FORMAT_EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp", "PNG": "png"}
+
+
+def _load(fileobj, max_dimension):
+    image = Image.open(fileobj)
+    # JPEG can decode straight at a fraction of full size, which is far
+    # cheaper than decoding a 12MP photo and shrinking it afterwards
+    image.draft("RGB", (max_dimension, max_dimension))
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _encode(image, image_format, quality):
+    buffer = BytesIO()
+    options = {"quality": quality}
+    if image_format == "JPEG":
+        options.update(optimize=True, progressive=True)
+    elif image_format == "WEBP":
+        options.update(method=4)
+    image.save(buffer, format=image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def render_variants(fileobj, sizes, image_format="JPEG", quality=85, square=False):
+    """
+    Return ``{name: ContentFile}`` with one re-encoded copy of the image
+    per entry of ``sizes`` (``{name: max_dimension}``), cropped to the
+    centre square first if ``square``.
+
+    Raises ``PIL.UnidentifiedImageError`` for data that is not an image
+    and ``PIL.Image.DecompressionBombError`` for absurd dimensions.
+    """
+    image = _load(fileobj, max(sizes.values()))
+    if square:
+        side = min(image.size)
+        image = ImageOps.fit(image, (side, side))
+
+    variants = {}
+    # largest first, so each copy is shrunk from the previous one
+    for name, max_dimension in sorted(sizes.items(), key=lambda item: -item[1]):
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        variants[name] = _encode(image, image_format, quality)
+    return variants
+
+
+def variant_name(original_name, suffix, image_format="JPEG"):
+    """``"kyc/documents/id_abc.png"`` -> ``"id_abc_<suffix>.jpg"``."""
+    stem = original_name.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    return f"{stem}_{suffix}.{FORMAT_EXTENSIONS[image_format]}"
+
+
+def store_variants(field_file, variants, fields, image_format="JPEG"):
+    """
+    Save ``variants`` (from ``render_variants``) in ``field_file``'s
+    storage. ``fields`` maps each variant name to the model field whose
+    ``upload_to`` names it. Returns ``{field name: stored name}``; if a
+    save fails, the variants already stored are deleted before raising.
+    """
+    storage = field_file.storage
+    saved = {}
+    try:
+        for name, content in variants.items():
+            field = fields[name]
+            saved[field.name] = storage.save(
+                field.generate_filename(
+                    None, variant_name(field_file.name, name, image_format=image_format)
+                ),
+                content,
+            )
+    except Exception:
+        delete_files(storage, saved.values())
+        raise
+    return saved
+
+
+def delete_files(storage, names):
+    """Delete ``names`` from ``storage``, logging rather than raising."""
+    for name in names:
+        if not name:
+            continue
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.warning("Could not delete %s", name, exc_info=True)
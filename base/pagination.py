@@ -0,0 +1,162 @@
+"""
+Keyset ("seek") pagination.
+
+Instead of ``OFFSET n``, which makes the database walk and discard every
+row before the page, each page starts from the sort values of the last
+row of the previous one: ``WHERE (a, id) < (last_a, last_id)``. Every page
+costs the same however deep the user goes, and rows inserted meanwhile
+don't shift the pages around.
+
+The ordering must end with a unique field (normally ``pk``) and its
+fields must not be NULL. Cursors are opaque, signed strings suitable for
+query parameters::
+
+    page = keyset_page(
+        User.objects.filter(is_staff=False),
+        ordering=("-date_joined", "-pk"),
+        cursor=request.GET.get("cursor"),
+        page_size=25,
+    )
+    page.items, page.next_cursor, page.previous_cursor
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = "base.pagination"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def _dump(value):
+    if isinstance(value, (datetime, date, Decimal)):
+        return {"t": type(value).__name__, "v": str(value)}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        kind = value.get("t")
+        if kind == "datetime":
+            return datetime.fromisoformat(value["v"])
+        if kind == "date":
+            return date.fromisoformat(value["v"])
+        if kind == "Decimal":
+            return Decimal(value["v"])
+        raise InvalidCursor(f"Unknown cursor value type: {kind}")
+    return value
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({"d": direction, "v": [_dump(v) for v in values]})
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor):
+    """``cursor`` -> ``(values, direction)``; raises ``InvalidCursor``."""
+    try:
+        payload = json.loads(signing.loads(cursor, salt=CURSOR_SALT))
+        values = [_load(v) for v in payload["v"]]
+        direction = payload["d"]
+    except (signing.BadSignature, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(str(e))
+    if direction not in ("next", "prev"):
+        raise InvalidCursor(f"Unknown cursor direction: {direction}")
+    return values, direction
+
+
+def _field_value(obj, field):
+    value = obj
+    for part in field.lstrip("-").split("__"):
+        value = getattr(value, part)
+    return value
+
+
+def _seek_filter(ordering, values, forward):
+    """
+    Rows strictly after ``values`` in ``ordering`` (or before, when not
+    ``forward``), as ``a > x OR (a = x AND b > y) OR ...``.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        descending = field.startswith("-")
+        lookup = "lt" if descending == forward else "gt"
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _reverse(ordering):
+    return [f[1:] if f.startswith("-") else f"-{f}" for f in ordering]
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=25):
+    """
+    Return a ``KeysetPage`` of ``queryset`` in ``ordering`` starting at
+    ``cursor`` (the first page when empty). An invalid or tampered
+    cursor raises ``InvalidCursor``.
+
+    One query per page: ``page_size + 1`` rows are fetched to learn
+    whether another page follows.
+    """
+    ordering = list(ordering)
+    forward = True
+
+    if cursor:
+        values, direction = decode_cursor(cursor)
+        if len(values) != len(ordering):
+            raise InvalidCursor("Cursor does not match the ordering")
+        forward = direction == "next"
+        queryset = queryset.filter(_seek_filter(ordering, values, forward))
+
+    queryset = queryset.order_by(*(ordering if forward else _reverse(ordering)))
+    rows = list(queryset[:page_size + 1])
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not forward:
+        rows.reverse()
+
+    def cursor_for(obj, direction):
+        return encode_cursor([_field_value(obj, f) for f in ordering], direction)
+
+    next_cursor = previous_cursor = None
+    if rows:
+        # walking backwards, there is always a next page (the one we came
+        # from); walking forwards, there is a previous one unless we
+        # started at the top
+        if has_more or not forward:
+            next_cursor = cursor_for(rows[-1], "next")
+        if cursor and (forward or has_more):
+            previous_cursor = cursor_for(rows[0], "prev")
+
+    return KeysetPage(rows, next_cursor, previous_cursor)
@@ -0,0 +1,118 @@
+"""
+Cache-backed rate limiting.
+
+Counts use the sliding-window-counter approximation: one counter per fixed
+window, and the estimate for "the last N seconds" weights the previous
+window by how much of it still overlaps. Each check is a constant number
+of cache operations whatever the traffic, so it needs a cache shared by
+all processes (see CACHES / REDIS_URL) to be effective in production.
+
+    @ratelimit(key="ip", rate="5/h", group="contact")
+    def contact_view(request): ...
+
+    is_allowed("otp:login:42", limit=3, period=600)
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.shortcuts import redirect
+
+RATE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """``"5/10m"`` -> ``(5, 600)``. The unit count defaults to 1."""
+    count, _, period = rate.partition("/")
+    multiplier = int(period[:-1] or 1)
+    return int(count), multiplier * RATE_UNITS[period[-1]]
+
+
+def get_client_ip(request):
+    # Vercel (and most proxies) put the client first in X-Forwarded-For
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def is_allowed(key, limit, period, increment=True):
+    """
+    Record a hit for ``key`` and return False if more than ``limit``
+    hits fall within the last ``period`` seconds.
+    """
+    if not getattr(settings, "RATELIMIT_ENABLE", True):
+        return True
+
+    now = time.time()
+    window = int(now // period)
+    overlap = 1 - (now % period) / period
+
+    current_key = f"rl:{key}:{window}"
+    previous_key = f"rl:{key}:{window - 1}"
+
+    if increment:
+        # keep each counter for two windows so it can serve as "previous"
+        cache.add(current_key, 0, timeout=period * 2)
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # evicted between add() and incr()
+            cache.set(current_key, 1, timeout=period * 2)
+            current = 1
+        previous = cache.get(previous_key, 0)
+    else:
+        counts = cache.get_many([current_key, previous_key])
+        current = counts.get(current_key, 0)
+        previous = counts.get(previous_key, 0)
+
+    return previous * overlap + current <= limit
+
+
+def _key_value(key, request):
+    if callable(key):
+        return key(request)
+    if key == "ip":
+        return get_client_ip(request)
+    if key == "user":
+        return str(request.user.pk) if request.user.is_authenticated else None
+    if key.startswith("post:"):
+        return request.POST.get(key[5:], "").strip().lower() or None
+    raise ValueError(f"Unknown rate limit key: {key}")
+
+
+def ratelimit(key, rate, group=None, methods=("POST",), message=None, redirect_to=None):
+    """
+    Limit how often a view handles ``methods`` requests per ``key``.
+
+    ``key`` is ``"ip"``, ``"user"``, ``"post:<field>"`` or a callable
+    taking the request (returning None skips the check). Over the limit,
+    the view is not called: the user gets an error message and is
+    redirected to ``redirect_to`` (a URL name or path), default the same
+    page. Stack several decorators to limit by more than one key.
+    """
+    limit, period = parse_rate(rate)
+
+    def decorator(view_func):
+        scope = group or f"{view_func.__module__}.{view_func.__qualname__}"
+
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            if request.method in methods:
+                value = _key_value(key, request)
+                if value is not None:
+                    digest = hashlib.sha1(value.encode()).hexdigest()[:16]
+                    name = key if isinstance(key, str) else "custom"
+                    if not is_allowed(f"{scope}:{name}:{digest}", limit, period):
+                        messages.error(
+                            request,
+                            message or "Too many attempts. Please wait a few minutes and try again.",
+                        )
+                        return redirect(redirect_to or request.get_full_path())
+            return view_func(request, *args, **kwargs)
+        return _wrapped_view
+
+    return decorator
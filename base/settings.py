@@ -67,6 +67,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'customer.middleware.PortfolioMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -104,6 +105,43 @@ DATABASES = {
 
 DATABASES = {'default': dj_database_url.config(default=os.environ['DATABASE_URL'], engine='django_cockroachdb')}
 
+# Shared cache for OTP codes, rate limits and the email circuit breaker.
+# Without REDIS_URL each process gets its own in-memory cache, which is
+# only good enough for local development.
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# base/ratelimit.py; turn off to disable all view rate limits
+RATELIMIT_ENABLE = os.getenv("RATELIMIT_ENABLE", "True").lower() == "true"
+
+# otp/stores.py: codes live in the cache when it is shared between processes
+OTP_STORE = "otp.stores.CacheOTPStore" if REDIS_URL else "otp.stores.DatabaseOTPStore"
+# also write cache-issued codes to the OTP table
+OTP_AUDIT_TO_DB = os.getenv("OTP_AUDIT_TO_DB", "False").lower() == "true"
+# purge_otps keeps used/expired codes this long
+OTP_RETENTION_HOURS = 24
+
+# Retries for CockroachDB serialization failures (see base/db.py)
+DB_RETRY_MAX_ATTEMPTS = 5
+DB_RETRY_BASE_DELAY = 0.05  # seconds
+DB_RETRY_MAX_DELAY = 1.0  # seconds
+
+# How long a money-moving form's idempotency key is honoured
+IDEMPOTENCY_KEY_TTL_MINUTES = 24 * 60
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -168,6 +206,14 @@ STORAGES = {
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'account.User'
+AUTHENTICATION_BACKENDS = [
+    'account.backends.PortfolioModelBackend',
+    # sessions created before PortfolioModelBackend still name this one
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# sessions are read from the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 LOGIN_URL = 'account:login'
 ADMIN_EMAIL = 'support@stonecrestcapital.io'
 # ADMIN_EMAIL = 'clevelandmedcenter@gmail.com'
@@ -188,7 +234,10 @@ MESSAGE_TAGS = {
 
 
 # email resend anymaikl
-EMAIL_BACKEND = "anymail.backends.resend.EmailBackend"
+# set EMAIL_BACKEND=django.core.mail.backends.locmem.EmailBackend (tests) or
+# django.core.mail.backends.filebased.EmailBackend + EMAIL_FILE_PATH (local dev)
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "anymail.backends.resend.EmailBackend")
+EMAIL_FILE_PATH = os.environ.get("EMAIL_FILE_PATH", BASE_DIR / "sent_emails")
 
 ANYMAIL = {
     "RESEND_API_KEY": os.environ.get("RESEND_API_KEY"),
@@ -197,6 +246,50 @@ ANYMAIL = {
 DEFAULT_FROM_EMAIL = "StoneCrest Capital <noreply@mail.gigifreight.org>"
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
+# outbox dispatcher (notification/outbox.py)
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_CLAIM_TIMEOUT_MINUTES = 10
+# failed sends back off 1m, 2m, 4m ... up to an hour, then go to dead letters
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 60
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 3600
+# stop sending for a while after this many failures in a row
+EMAIL_CIRCUIT_FAILURE_THRESHOLD = 5
+EMAIL_CIRCUIT_RESET_SECONDS = 120
+
+# admin notifications (notification/digest.py): registrations and deposits
+# are batched into one email per window; deposits at or above the
+# threshold are still emailed immediately
+ADMIN_DIGEST_ENABLED = True
+ADMIN_DIGEST_WINDOW_MINUTES = 5
+ADMIN_DIGEST_IMMEDIATE_AMOUNT = 10000
+
+# staff analytics (staff/analytics.py): days of flow rollups recomputed
+# on each refresh
+ANALYTICS_REFRESH_DAYS = 7
+
+# customer deletion jobs (staff/deletion.py): rows per transaction, and
+# how long one cron run keeps working before leaving the rest for the next
+CUSTOMER_DELETION_BATCH_SIZE = 500
+CUSTOMER_DELETION_TIME_BUDGET_SECONDS = 40
+CUSTOMER_DELETION_CLAIM_TIMEOUT_MINUTES = 10
+
+# KYC uploads (account/kyc_images.py) are re-encoded to at most this many
+# pixels on the long side, with thumbnails for the staff review queue
+KYC_IMAGE_MAX_DIMENSION = 2000
+KYC_THUMBNAIL_SIZE = 480
+KYC_IMAGE_QUALITY = 85
+KYC_IMAGE_BATCH_SIZE = 20
+
+# square WebP profile image variants (customer/profile_images.py); each
+# name needs a Portfolio.profile_image_<name> field
+PROFILE_IMAGE_SIZES = {"small": 80, "medium": 240, "large": 480}
+PROFILE_IMAGE_QUALITY = 80
+PROFILE_IMAGE_BATCH_SIZE = 20
+
+# bearer token Vercel Cron sends to /cron/<job>/
+CRON_SECRET = os.environ.get("CRON_SECRET")
+
 
 # EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 
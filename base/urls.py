@@ -3,6 +3,8 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
+from .cron import cron_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('frontend.urls', namespace='frontend')),
@@ -11,5 +13,6 @@ urlpatterns = [
     path('user/', include('customer.urls', namespace='customer')),
     path('staff/', include('staff.urls', namespace='staff')),
     path('mirrow-expert/', include('copytrade.urls', namespace='copytrade')),
+    path('cron/<slug:job_name>/', cron_view, name='cron'),
 ]
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -1,11 +1,12 @@
 from decimal import Decimal
-from django.db import transaction
 from django.core.exceptions import ValidationError
 
+from base.db import atomic_retry
 from .models import CopyRelationship, CopyTrade
+from customer.models import Portfolio
 from plan.models import OrderPlan
 
-@transaction.atomic
+@atomic_retry
 def start_copy_service(*, follower, leader, allocated_cash):
     """
     Start copying a leader portfolio:
@@ -17,6 +18,9 @@ def start_copy_service(*, follower, leader, allocated_cash):
     if allocated_cash <= 0:
         raise ValidationError("Please allocate a positive cash amount.")
 
+    # Work on a locked copy so a retried attempt never sees stale balances
+    follower = Portfolio.objects.select_for_update().get(pk=follower.pk)
+
     if follower == leader:
         raise ValidationError("You cannot copy your own portfolio.")
 
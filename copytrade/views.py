@@ -3,12 +3,16 @@ from decimal import Decimal
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 
+from customer.decorators import portfolio_required
 from customer.models import Portfolio
 from .models import CopyRelationship
 from .services import start_copy_service
+from transaction.idempotency import idempotent_post
 
+@portfolio_required
+@idempotent_post
 def start_copy_view(request, portfolio_id):
-    follower = request.user.portfolio
+    follower = request.portfolio
     leader = get_object_or_404(Portfolio, id=portfolio_id)
 
     if request.method == "POST":
@@ -0,0 +1,16 @@
+from functools import wraps
+
+from django.http import Http404
+
+
+def portfolio_required(view_func):
+    """
+    404 for users without a portfolio (e.g. staff accounts), so views can
+    use ``request.portfolio`` as set by PortfolioMiddleware.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if request.portfolio is None:
+            raise Http404("No portfolio for this user.")
+        return view_func(request, *args, **kwargs)
+    return _wrapped_view
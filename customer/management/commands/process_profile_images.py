@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from customer.profile_images import process_pending_profile_images
+
+
+class Command(BaseCommand):
+    help = "Render the responsive WebP variants of newly uploaded profile images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Keep going until every queued portfolio is processed (backfill).",
+        )
+
+    def handle(self, *args, **options):
+        totals = {"processed": 0, "skipped": 0, "failed": 0}
+
+        while True:
+            result = process_pending_profile_images(batch_size=options["batch_size"])
+            for key in totals:
+                totals[key] += result[key]
+            # failed portfolios are retried on the next scheduled run
+            if not options["all"] or not (result["processed"] or result["skipped"]):
+                break
+
+        self.stdout.write(
+            f"Processed {totals['processed']} profile images "
+            f"({totals['skipped']} changed meanwhile, {totals['failed']} failed)"
+        )
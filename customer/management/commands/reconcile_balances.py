@@ -0,0 +1,139 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from copytrade.models import CopyRelationship
+from customer.models import Portfolio
+from plan.models import OrderPlan
+from transaction.models import Transaction
+
+ZERO = Decimal("0.00")
+
+
+def _by_portfolio(rows, key):
+    return {row.pop(key): row for row in rows}
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every portfolio's expected cash balance from its transactions, "
+        "order plans and copy allocations, and report portfolios that drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--tolerance",
+            type=Decimal,
+            default=Decimal("0.01"),
+            help="Ignore drift smaller than this amount.",
+        )
+        parser.add_argument(
+            "--fail-on-drift",
+            action="store_true",
+            help="Exit with an error if any portfolio drifts (for cron alerts).",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        tolerance = options["tolerance"]
+
+        checked, drifted, total_drift = self.reconcile(chunk_size, tolerance)
+
+        self.stdout.write(
+            f"Checked {checked} portfolios: {drifted} drifted, "
+            f"total absolute drift {total_drift}"
+        )
+
+        if drifted and options["fail_on_drift"]:
+            raise CommandError(f"{drifted} portfolios do not reconcile")
+
+    def reconcile(self, chunk_size, tolerance):
+        checked = drifted = 0
+        total_drift = ZERO
+        last_id = None
+
+        # keyset chunks of portfolios; the aggregates below are computed
+        # per id range, so memory is bounded by the chunk size
+        while True:
+            # one short transaction per chunk: the balances and the
+            # aggregates come from the same snapshot without holding a
+            # serializable read open across the whole scan
+            with transaction.atomic():
+                portfolios = Portfolio.objects.order_by("id")
+                if last_id is not None:
+                    portfolios = portfolios.filter(id__gt=last_id)
+                portfolios = list(portfolios.values_list("id", "user__email", "cash_balance")[:chunk_size])
+                if not portfolios:
+                    break
+                first_id, last_id = portfolios[0][0], portfolios[-1][0]
+                balances = list(self.expected_balances(portfolios, first_id, last_id))
+
+            for portfolio_id, email, cash_balance, expected in balances:
+                drift = cash_balance - expected
+                checked += 1
+                if abs(drift) >= tolerance:
+                    drifted += 1
+                    total_drift += abs(drift)
+                    self.stdout.write(
+                        f"portfolio={portfolio_id} email={email} "
+                        f"balance={cash_balance} expected={expected} drift={drift}"
+                    )
+
+        return checked, drifted, total_drift
+
+    def expected_balances(self, portfolios, first_id, last_id):
+        """Yield (id, email, cash_balance, expected) for one chunk of portfolios."""
+        transactions = _by_portfolio(
+            Transaction.objects
+            .filter(portfolio_id__gte=first_id, portfolio_id__lte=last_id)
+            .order_by()
+            .values("portfolio_id")
+            .annotate(
+                deposits=Sum("amount", filter=Q(transaction_type="DEPOSIT", status="SUCCESSFUL")),
+                dividends=Sum("amount", filter=Q(transaction_type="DIVIDEND", status="SUCCESSFUL")),
+                # withdrawals are reserved from the balance when requested
+                withdrawals=Sum(
+                    "amount",
+                    filter=Q(transaction_type="WITHDRAW", status__in=["PENDING", "SUCCESSFUL"]),
+                ),
+            ),
+            "portfolio_id",
+        )
+
+        # mirrored orders are funded from the copy allocation, not cash
+        orders = _by_portfolio(
+            OrderPlan.objects
+            .filter(is_mirrowed=False, portfolio_id__gte=first_id, portfolio_id__lte=last_id)
+            .order_by()
+            .values("portfolio_id")
+            .annotate(
+                principal=Sum("principal_amount"),
+            ),
+            "portfolio_id",
+        )
+
+        copies = _by_portfolio(
+            CopyRelationship.objects
+            .filter(follower_id__gte=first_id, follower_id__lte=last_id)
+            .order_by()
+            .values("follower_id")
+            .annotate(allocated=Sum("allocated_cash")),
+            "follower_id",
+        )
+
+        for portfolio_id, email, cash_balance in portfolios:
+            trx = transactions.get(portfolio_id, {})
+            order = orders.get(portfolio_id, {})
+            copy = copies.get(portfolio_id, {})
+
+            expected = (
+                (trx.get("deposits") or ZERO)
+                + (trx.get("dividends") or ZERO)
+                - (trx.get("withdrawals") or ZERO)
+                - (order.get("principal") or ZERO)
+                - (copy.get("allocated") or ZERO)
+            )
+            yield portfolio_id, email, cash_balance, expected
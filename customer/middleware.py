@@ -0,0 +1,17 @@
+class PortfolioMiddleware:
+    """
+    Set ``request.portfolio`` to the logged-in user's portfolio, or None
+    for anonymous users and staff without one. With
+    PortfolioModelBackend the portfolio comes from the query that loaded
+    ``request.user``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.portfolio = None
+        if request.user.is_authenticated:
+            request.portfolio = getattr(request.user, 'portfolio', None)
+
+        return self.get_response(request)
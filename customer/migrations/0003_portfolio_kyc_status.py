@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0002_portfolio_profile_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolio',
+            name='kyc_status',
+            field=models.CharField(choices=[('NOT_SUBMITTED', 'Not Submitted'), ('PENDING', 'Pending Review'), ('VERIFIED', 'Verified'), ('REJECTED', 'Rejected')], default='NOT_SUBMITTED', max_length=20),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0003_portfolio_kyc_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='portfolio',
+            index=models.Index(fields=['cash_balance', 'id'], name='portfolio_balance_idx'),
+        ),
+    ]
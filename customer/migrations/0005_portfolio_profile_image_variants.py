@@ -0,0 +1,54 @@
+# Generated by Django 4.2 on 2026-10-19 12:45
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def queue_existing_images(apps, schema_editor):
+    # render variants for profile images uploaded before this migration
+    Portfolio = apps.get_model('customer', 'Portfolio')
+    Portfolio.objects.exclude(profile_image__isnull=True).exclude(profile_image='').update(
+        profile_image_updated_at=F('created_at')
+    )
+
+
+class Migration(migrations.Migration):
+    # CockroachDB does not allow writes and schema changes in one transaction
+    atomic = False
+
+    dependencies = [
+        ('customer', '0004_portfolio_balance_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolio',
+            name='profile_image_large',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_images/variants/'),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='profile_image_medium',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_images/variants/'),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='profile_image_processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='profile_image_small',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_images/variants/'),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='profile_image_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='portfolio',
+            index=models.Index(condition=models.Q(('profile_image_processed_at__isnull', True), ('profile_image_updated_at__isnull', False)), fields=['profile_image_updated_at'], name='portfolio_image_pending_idx'),
+        ),
+        migrations.RunPython(queue_existing_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_kyc_status(apps, schema_editor):
+    # copy each submitted KYC's status onto its portfolio; portfolios
+    # without one keep the NOT_SUBMITTED default
+    KYC = apps.get_model('account', 'KYC')
+    Portfolio = apps.get_model('customer', 'Portfolio')
+
+    last_id = None
+    while True:
+        kycs = KYC.objects.order_by('portfolio_id')
+        if last_id is not None:
+            kycs = kycs.filter(portfolio_id__gt=last_id)
+        batch = list(kycs.values_list('portfolio_id', 'status')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        by_status = {}
+        for portfolio_id, status in batch:
+            by_status.setdefault(status, []).append(portfolio_id)
+        for status, portfolio_ids in by_status.items():
+            Portfolio.objects.filter(pk__in=portfolio_ids).update(kyc_status=status)
+
+
+class Migration(migrations.Migration):
+    # CockroachDB: each batch commits on its own instead of one huge write
+    atomic = False
+
+    dependencies = [
+        ('account', '0010_kyc_processed_images'),
+        ('customer', '0005_portfolio_profile_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_kyc_status, migrations.RunPython.noop),
+    ]
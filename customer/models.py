@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 
+from account.models import KYC
+
 User = get_user_model()
 
 class Portfolio(models.Model):
@@ -11,17 +13,58 @@ class Portfolio(models.Model):
         blank=True,
         null=True,
     )
+    # square WebP copies of profile_image (customer/profile_images.py)
+    profile_image_small = models.ImageField(
+        upload_to="profile_images/variants/",
+        blank=True,
+        null=True,
+    )
+    profile_image_medium = models.ImageField(
+        upload_to="profile_images/variants/",
+        blank=True,
+        null=True,
+    )
+    profile_image_large = models.ImageField(
+        upload_to="profile_images/variants/",
+        blank=True,
+        null=True,
+    )
+    # set when a new profile_image is uploaded; None if there never was one
+    profile_image_updated_at = models.DateTimeField(null=True, blank=True)
+    # None until the variants above have been rendered for profile_image
+    profile_image_processed_at = models.DateTimeField(null=True, blank=True)
     cash_balance = models.DecimalField(
         max_digits=15,
         decimal_places=2,
         default=Decimal('0.00')
     )
+    # copy of kyc.status, kept in sync by KYC.save()
+    kyc_status = models.CharField(
+        max_length=20,
+        choices=KYC.STATUS_CHOICES,
+        default=KYC.STATUS_NOT_SUBMITTED
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # staff customer list sorted by balance
+            models.Index(fields=['cash_balance', 'id'], name='portfolio_balance_idx'),
+            # profile image processing queue
+            models.Index(
+                fields=['profile_image_updated_at'],
+                name='portfolio_image_pending_idx',
+                condition=models.Q(
+                    profile_image_updated_at__isnull=False,
+                    profile_image_processed_at__isnull=True,
+                ),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user} Portfolio"
     
     @property
     def is_kyc_verified(self):
-        return hasattr(self, "kyc") and self.kyc.status == "VERIFIED"
+        return self.kyc_status == KYC.STATUS_VERIFIED
 
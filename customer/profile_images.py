@@ -0,0 +1,119 @@
+"""
+Responsive variants of customer profile images.
+
+``change_profile_image`` stores the upload as it is and queues the
+portfolio. ``process_pending_profile_images`` (``manage.py
+process_profile_images`` or the ``process-profile-images`` cron job)
+then renders small/medium/large square WebP copies sized by
+PROFILE_IMAGE_SIZES, and the ``profile_image`` template tag serves them
+through ``srcset`` so a 40px avatar no longer downloads a phone photo.
+
+Until a portfolio has been processed the tag falls back to the original
+upload. As with KYC images, the new names are written with a conditional
+UPDATE that only matches if the portfolio still has the upload that was
+rendered; otherwise the renders are deleted.
+"""
+import logging
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from base.images import delete_files, render_variants, store_variants
+from .models import Portfolio
+
+logger = logging.getLogger(__name__)
+
+VARIANT_FORMAT = "WEBP"
+
+
+def variant_sizes():
+    """``{"small": 80, ...}``; each name has a ``profile_image_<name>`` field."""
+    return getattr(
+        settings, 'PROFILE_IMAGE_SIZES', {"small": 80, "medium": 240, "large": 480}
+    )
+
+
+def _render(field_file):
+    with field_file.open("rb") as source:
+        variants = render_variants(
+            source,
+            variant_sizes(),
+            image_format=VARIANT_FORMAT,
+            quality=getattr(settings, 'PROFILE_IMAGE_QUALITY', 80),
+            square=True,
+        )
+
+    fields = {name: Portfolio._meta.get_field(f"profile_image_{name}") for name in variants}
+    return store_variants(field_file, variants, fields, image_format=VARIANT_FORMAT)
+
+
+def process_profile_image(portfolio):
+    """
+    Render the variants for one portfolio. Returns True if the portfolio
+    was updated, False if the image changed while it was being rendered.
+    """
+    field_file = portfolio.profile_image
+    storage = field_file.storage
+    variant_fields = [f"profile_image_{name}" for name in variant_sizes()]
+    # variants of an unusable or removed image are cleared
+    updates = dict.fromkeys(variant_fields)
+    if field_file:
+        try:
+            updates.update(_render(field_file))
+        except (UnidentifiedImageError, Image.DecompressionBombError):
+            # served as uploaded
+            logger.warning("Portfolio %s: profile image is not a usable image", portfolio.pk)
+
+    # profile_image_updated_at changes with every upload, so it identifies
+    # the image that was rendered
+    updated = Portfolio.objects.filter(
+        pk=portfolio.pk,
+        profile_image_updated_at=portfolio.profile_image_updated_at,
+        profile_image_processed_at__isnull=True,
+    ).update(profile_image_processed_at=timezone.now(), **updates)
+
+    if not updated:
+        delete_files(storage, updates.values())
+        return False
+
+    # variants of the previous upload
+    delete_files(storage, [
+        getattr(portfolio, field).name
+        for field in variant_fields
+        if getattr(portfolio, field)
+    ])
+    return True
+
+
+def process_pending_profile_images(batch_size=None):
+    """
+    Process up to ``batch_size`` queued portfolios, oldest upload first.
+    Returns ``{"processed": n, "skipped": n, "failed": n}``.
+    """
+    batch_size = batch_size or getattr(settings, 'PROFILE_IMAGE_BATCH_SIZE', 20)
+    totals = {"processed": 0, "skipped": 0, "failed": 0}
+
+    pending = (
+        Portfolio.objects
+        .filter(profile_image_updated_at__isnull=False, profile_image_processed_at__isnull=True)
+        .order_by('profile_image_updated_at')[:batch_size]
+    )
+    for portfolio in pending:
+        try:
+            if process_profile_image(portfolio):
+                totals["processed"] += 1
+            else:
+                totals["skipped"] += 1
+        except Exception:
+            # left unprocessed, at the back of the queue
+            print(f"\nPROFILE IMAGE ERROR (portfolio {portfolio.pk}):")
+            traceback.print_exc()
+            Portfolio.objects.filter(
+                pk=portfolio.pk,
+                profile_image_updated_at=portfolio.profile_image_updated_at,
+            ).update(profile_image_updated_at=timezone.now())
+            totals["failed"] += 1
+
+    return totals
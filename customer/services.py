@@ -0,0 +1,56 @@
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from base.db import atomic_retry
+from plan.models import OrderPlan
+from .models import Portfolio
+
+
+@atomic_retry
+def submit_withdrawal(portfolio_id, trans):
+    """
+    Reserve the withdrawal amount from the portfolio and save the
+    pending WITHDRAW transaction.
+    """
+    portfolio = Portfolio.objects.select_for_update().get(pk=portfolio_id)
+
+    if portfolio.cash_balance < trans.amount:
+        raise ValidationError(
+            "You don't have enough cash balance to complete this withdrawal."
+        )
+
+    portfolio.cash_balance -= trans.amount
+    portfolio.save(update_fields=['cash_balance'])
+
+    # a retried attempt must insert afresh
+    trans.pk = None
+    trans.portfolio = portfolio
+    trans.balance = portfolio.cash_balance
+    trans.save()
+    return trans
+
+
+@atomic_retry
+def activate_plan(portfolio_id, plan, allocated_cash):
+    """
+    Deduct allocated cash from the portfolio and open an active OrderPlan.
+    """
+    portfolio = Portfolio.objects.select_for_update().get(pk=portfolio_id)
+
+    if allocated_cash > portfolio.cash_balance:
+        raise ValidationError(
+            "Allocated cash exceeds your available cash balance."
+        )
+
+    portfolio.cash_balance -= allocated_cash
+    portfolio.save(update_fields=['cash_balance'])
+
+    return OrderPlan.objects.create(
+        portfolio=portfolio,
+        plan=plan,
+        principal_amount=allocated_cash,
+        current_value=allocated_cash,
+        start_at=timezone.now(),
+        status=OrderPlan.STATUS_ACTIVE,
+        yield_percent=plan.percent_increment,
+    )
@@ -0,0 +1,40 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from customer.profile_images import variant_sizes
+
+register = template.Library()
+
+
+def _variants(portfolio):
+    """``[(url, width), ...]`` smallest first, or [] if not rendered yet."""
+    if not portfolio.profile_image_processed_at:
+        return []
+    variants = []
+    for name, width in sorted(variant_sizes().items(), key=lambda item: item[1]):
+        field_file = getattr(portfolio, f"profile_image_{name}")
+        if field_file:
+            variants.append((field_file.url, width))
+    return variants
+
+
+@register.simple_tag
+def profile_image(portfolio, size, **attrs):
+    """
+    ``<img>`` for ``portfolio.profile_image`` displayed at ``size`` CSS
+    pixels, with a ``srcset`` of the WebP variants so the browser picks the
+    smallest one sharp enough for the screen. Falls back to the original
+    upload until the variants exist. Extra keyword arguments become
+    attributes: ``{% profile_image portfolio 120 class="rounded-circle" %}``.
+    """
+    attrs.update(width=size, height=size)
+    variants = _variants(portfolio)
+    if not variants:
+        return format_html('<img src="{}"{}>', portfolio.profile_image.url, flatatt(attrs))
+
+    # smallest variant that covers a 2x display
+    src = next((url for url, width in variants if width >= size * 2), variants[-1][0])
+    attrs["srcset"] = ", ".join(f"{url} {width}w" for url, width in variants)
+    attrs["sizes"] = f"{size}px"
+    return format_html('<img src="{}"{}>', src, flatatt(attrs))
@@ -1,11 +1,13 @@
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.db.models import Sum, Q
 from decimal import Decimal
 from django.utils import timezone
 from django.core.paginator import Paginator
+from django.urls import reverse
 from django.contrib.auth import update_session_auth_hash
 import json
 from django.db.models.functions import TruncDate
@@ -14,18 +16,24 @@ from django.conf import settings
 import traceback
 
 from .models import Portfolio
+from .decorators import portfolio_required
+from .services import submit_withdrawal, activate_plan
 from .forms import KYCForm, ProfileImageForm, UpdateProfileForm
 from account.models import KYC, VIPRequest
+from account.kyc_images import IMAGE_FIELDS, queue_resubmitted_images
 from account.forms import BootstrapPasswordChangeForm, VIPRequestForm
 from plan.models import Plan, OrderPlan, OrderPlanItem
 from transaction.forms import CustomerTransactionForm
 from copytrade.models import CopyRelationship
 from transaction.models import Coin, Wallet
-from notification.email_utils import send_html_email
+from transaction.idempotency import idempotent_post
+from notification.digest import notify_admin
+from notification.models import AdminEvent
 
 @login_required
+@portfolio_required
 def customer_dashboard_view(request):
-    portfolio = Portfolio.objects.get(user=request.user)
+    portfolio = request.portfolio
     plans = Plan.objects.filter(is_featured=True)
 
     # All active plans for this portfolio (mirrored or not)
@@ -148,9 +156,10 @@ def customer_dashboard_view(request):
 
 
 @login_required
+@portfolio_required
 def copy_experts(request):
     user = request.user
-    user_portfolio = user.portfolio
+    user_portfolio = request.portfolio
 
     # Get all expert portfolios (excluding self and staff)
     portfolios = (
@@ -182,8 +191,9 @@ def copy_experts(request):
 
 
 @login_required
+@portfolio_required
 def settings_security(request):
-    portfolio = get_object_or_404(Portfolio, user=request.user)
+    portfolio = request.portfolio
 
     if request.method == "POST":
         profile_form = UpdateProfileForm(
@@ -214,8 +224,9 @@ def settings_security(request):
 
 
 @login_required
+@portfolio_required
 def verify_kyc_view(request):
-    portfolio = get_object_or_404(Portfolio, user=request.user)
+    portfolio = request.portfolio
 
     # Get or create KYC record
     kyc, created = KYC.objects.get_or_create(portfolio=portfolio)
@@ -229,6 +240,10 @@ def verify_kyc_view(request):
         form = KYCForm(request.POST, request.FILES, instance=kyc)
 
         if form.is_valid():
+            resubmitted = [name for name in IMAGE_FIELDS if name in form.changed_data]
+            if resubmitted:
+                # new uploads: account/kyc_images.py shrinks them in the background
+                queue_resubmitted_images(form.instance, resubmitted)
             form.save()
             messages.success(
                 request,
@@ -253,9 +268,11 @@ def verify_kyc_view(request):
 
 # transaction part
 @login_required
+@portfolio_required
+@idempotent_post
 @transaction.atomic
 def customer_deposit_view(request):
-    portfolio = request.user.portfolio
+    portfolio = request.portfolio
     deposit_transactions = portfolio.transactions.filter(
         transaction_type='DEPOSIT'
     )
@@ -282,9 +299,13 @@ def customer_deposit_view(request):
             print("🚀 ABOUT TO SEND ADMIN EMAIL")
             # ✅ Send admin notification
             try:
-                send_html_email(
+                notify_admin(
+                    AdminEvent.DEPOSIT_REQUEST,
+                    summary=f"Deposit request: ${trans.amount} from {request.user.email}",
+                    url=reverse('staff:admin_deposit_requests'),
+                    user=request.user,
+                    amount=trans.amount,
                     subject="New Deposit Request",
-                    to_email=[settings.ADMIN_EMAIL],
                     template_name="notification/emails/admin_deposit_request.html",
                     context={
                         "user": request.user,
@@ -319,9 +340,10 @@ def customer_deposit_view(request):
 
 
 @login_required
-@transaction.atomic
+@portfolio_required
+@idempotent_post
 def customer_withdraw_view(request):
-    portfolio = request.user.portfolio
+    portfolio = request.portfolio
 
     # Only fetch withdraw transactions once
     withdraw_transactions = portfolio.transactions.filter(
@@ -358,11 +380,12 @@ def customer_withdraw_view(request):
                     )
                     return redirect('customer:verify_kyc')
                 # Deduct from balance and save
-                portfolio.cash_balance -= trans.amount
-                portfolio.save()
+                try:
+                    submit_withdrawal(portfolio.pk, trans)
+                except ValidationError as e:
+                    messages.error(request, e.messages[0])
+                    return redirect('customer:customer_withdraw')
 
-                trans.balance = portfolio.cash_balance
-                trans.save()
                 messages.success(
                     request,
                     "Your withdrawal request has been submitted successfully and is pending processing."
@@ -385,8 +408,9 @@ def customer_withdraw_view(request):
 
 
 @login_required
+@portfolio_required
 def reits_view(request):
-    portfolio = get_object_or_404(Portfolio, user=request.user)
+    portfolio = request.portfolio
     reit_plans = Plan.objects.filter(plantype="REIT")
 
     context = {
@@ -399,8 +423,9 @@ def reits_view(request):
 
 
 @login_required
+@portfolio_required
 def all_plans_view(request):
-    portfolio = get_object_or_404(Portfolio, user=request.user)
+    portfolio = request.portfolio
     # plans = Plan.objects.all()
     plans = Plan.objects.exclude(plantype=Plan.PlanType.REIT)
 
@@ -414,8 +439,9 @@ def all_plans_view(request):
 
 
 @login_required
+@portfolio_required
 def general_plans_view(request):
-    portfolio = get_object_or_404(Portfolio, user=request.user)
+    portfolio = request.portfolio
     plans = Plan.objects.all()
 
     context = {
@@ -428,8 +454,10 @@ def general_plans_view(request):
 
 
 @login_required
+@portfolio_required
+@idempotent_post
 def activate_plan_view(request, plan_id):
-    portfolio = request.user.portfolio
+    portfolio = request.portfolio
     plan = get_object_or_404(Plan, id=plan_id)
 
     if request.method == "POST":
@@ -439,26 +467,12 @@ def activate_plan_view(request, plan_id):
             messages.error(request, f"Minimum amount for this plan is ${plan.min_amount}.") 
             return redirect('customer:activate_plan', plan_id=plan.pk)
         
-        if allocated_cash > portfolio.cash_balance:
-            messages.error(
-                request,
-                "Allocated cash exceeds your available cash balance."
-            )
-            return redirect('customer:activate_plan', plan_id=plan.pk)
-        
         # 1️⃣ Deduct allocated cash from follower only once
-        portfolio.cash_balance -= allocated_cash
-        portfolio.save(update_fields=['cash_balance'])
-
-        order = OrderPlan.objects.create( 
-            portfolio=portfolio, 
-            plan=plan, 
-            principal_amount=allocated_cash, 
-            current_value=allocated_cash, 
-            start_at=timezone.now(), 
-            status=OrderPlan.STATUS_ACTIVE,
-            yield_percent= plan.percent_increment,
-        )
+        try:
+            activate_plan(portfolio.pk, plan, allocated_cash)
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+            return redirect('customer:activate_plan', plan_id=plan.pk)
 
         messages.success(request, f"'{plan.name}' activated with ${allocated_cash}.") 
         return redirect('customer:customer_dashboard')
@@ -474,8 +488,9 @@ def activate_plan_view(request, plan_id):
 
 
 @login_required
+@portfolio_required
 def active_plan_list_view(request):
-    portfolio = request.user.portfolio
+    portfolio = request.portfolio
     active_plans = OrderPlan.objects.filter(portfolio=portfolio)
 
     return render(
@@ -489,8 +504,9 @@ def active_plan_list_view(request):
 
 
 @login_required
+@portfolio_required
 def orderplan_detail_view(request, order_id):
-    portfolio = request.user.portfolio
+    portfolio = request.portfolio
     order = get_object_or_404(OrderPlan, pk=order_id, portfolio=portfolio) 
     
     snapshots_qs = order.items.order_by('snapshot_at')
@@ -572,8 +588,9 @@ def submit_vip_request(request):
 
 
 @login_required
+@portfolio_required
 def wallet_view(request):
-    portfolio = request.user.portfolio
+    portfolio = request.portfolio
 
     totals = OrderPlan.objects.filter(
         portfolio=portfolio
@@ -616,8 +633,9 @@ def get_wallet(request):
 
 
 @login_required
+@portfolio_required
 def change_profile_image(request):
-    portfolio = request.user.portfolio
+    portfolio = request.portfolio
 
     if request.method == "POST":
         form = ProfileImageForm(
@@ -627,6 +645,10 @@ def change_profile_image(request):
         )
 
         if form.is_valid():
+            if "profile_image" in form.changed_data:
+                # variants are rendered by process_pending_profile_images
+                form.instance.profile_image_updated_at = timezone.now()
+                form.instance.profile_image_processed_at = None
             form.save()
             messages.success(request, "Your profile picture has been updated successfully.")
             return redirect("customer:change_profile_image")
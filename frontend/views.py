@@ -2,7 +2,8 @@ from django.conf import settings
 from django.contrib import messages
 from django.shortcuts import render, redirect
 
-from notification.email_utils import send_html_email
+from notification.outbox import queue_html_email
+from base.ratelimit import ratelimit
 from .forms import ContactForm
 
 def home_view(request):
@@ -14,6 +15,8 @@ def about_view(request):
 # def contact_view(request):
 #     return render(request, 'frontend/contact.html')
 
+@ratelimit(key="ip", rate="5/h", group="contact", redirect_to="frontend:contact",
+           message="You have sent several messages recently. Please try again later.")
 def contact_view(request):
     if request.method == 'POST':
         form = ContactForm(request.POST)
@@ -28,7 +31,7 @@ def contact_view(request):
 
             try:
                 # Send email to admin using your HTML template
-                send_html_email(
+                queue_html_email(
                     subject=f"[Contact Form] {subject or topic}",
                     to_email=[settings.ADMIN_EMAIL],
                     template_name="notification/emails/contact_email.html",
@@ -0,0 +1,106 @@
+"""
+Admin notifications batched into a periodic digest.
+
+``notify_admin`` records an ``AdminEvent``; the ``admin-digest`` cron job
+(``send_admin_digest``) folds everything recorded since the last digest
+into one email once the oldest event is ADMIN_DIGEST_WINDOW_MINUTES old.
+Deposits at or above ADMIN_DIGEST_IMMEDIATE_AMOUNT, and every event when
+ADMIN_DIGEST_ENABLED is off, are emailed straight away as before.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from base.db import atomic_retry
+from .models import AdminEvent
+from .outbox import queue_html_email
+
+DIGEST_MAX_ITEMS = 50
+
+
+def _is_immediate(amount):
+    if not getattr(settings, 'ADMIN_DIGEST_ENABLED', True):
+        return True
+    threshold = getattr(settings, 'ADMIN_DIGEST_IMMEDIATE_AMOUNT', None)
+    return amount is not None and threshold is not None and amount >= Decimal(threshold)
+
+
+def notify_admin(event_type, summary, subject, template_name, context,
+                 user=None, amount=None, url=""):
+    """
+    Record an admin event and email it now if it bypasses the digest.
+    ``subject``, ``template_name`` and ``context`` are only used for
+    the immediate email.
+    """
+    immediate = _is_immediate(amount)
+
+    AdminEvent.objects.create(
+        event_type=event_type,
+        user=user,
+        amount=amount,
+        # names and emails are user input and can outgrow the column
+        summary=Truncator(summary).chars(AdminEvent._meta.get_field('summary').max_length),
+        url=url,
+        sent_immediately=immediate,
+        digested_at=timezone.now() if immediate else None,
+    )
+
+    if immediate:
+        queue_html_email(
+            subject=subject,
+            to_email=[settings.ADMIN_EMAIL],
+            template_name=template_name,
+            context=context,
+        )
+
+
+@atomic_retry
+def send_admin_digest(force=False):
+    """
+    Queue one digest email covering every undigested event.
+    Does nothing until the oldest event is a full window old, unless
+    ``force`` is set. Returns ``{"events": n}``.
+    """
+    now = timezone.now()
+    window = timedelta(minutes=getattr(settings, 'ADMIN_DIGEST_WINDOW_MINUTES', 5))
+
+    events = list(
+        AdminEvent.objects
+        .select_for_update()
+        .filter(digested_at__isnull=True)
+        .order_by('created_at')
+    )
+    if not events or (not force and events[0].created_at > now - window):
+        return {"events": 0}
+
+    labels = dict(AdminEvent.EVENT_CHOICES)
+    counts = {}
+    deposit_total = Decimal('0')
+    for event in events:
+        counts[event.event_type] = counts.get(event.event_type, 0) + 1
+        if event.event_type == AdminEvent.DEPOSIT_REQUEST and event.amount:
+            deposit_total += event.amount
+
+    AdminEvent.objects.filter(pk__in=[e.pk for e in events]).update(digested_at=now)
+
+    queue_html_email(
+        subject=f"{settings.SITE_NAME} activity: {len(events)} new events",
+        to_email=[settings.ADMIN_EMAIL],
+        template_name="notification/emails/admin_digest.html",
+        context={
+            "events": events[:DIGEST_MAX_ITEMS],
+            "more": max(len(events) - DIGEST_MAX_ITEMS, 0),
+            "counts": [(labels.get(key, key), count) for key, count in counts.items()],
+            "deposit_total": deposit_total,
+            "period_start": events[0].created_at,
+            "period_end": now,
+            "threshold": getattr(settings, 'ADMIN_DIGEST_IMMEDIATE_AMOUNT', None),
+            "site_url": f"https://{settings.SITE_DOMAIN}",
+            "site_name": settings.SITE_NAME,
+            "year": now.year,
+        },
+    )
+    return {"events": len(events)}
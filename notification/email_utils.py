@@ -1,8 +1,8 @@
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.conf import settings
 
+from .rendering import render_email
+
 
 def send_html_email(
     subject: str,
@@ -25,11 +25,8 @@ def send_html_email(
 
     from_email = from_email or settings.DEFAULT_FROM_EMAIL
 
-    # Render HTML content
-    html_content = render_to_string(template_name, context)
-
-    # Create plain-text version from HTML
-    text_content = strip_tags(html_content)
+    # Render HTML and plain-text versions
+    html_content, text_content = render_email(template_name, context)
 
     # Create email
     email = EmailMultiAlternatives(
@@ -0,0 +1,99 @@
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from notification.rendering import clear_cache, render_email
+
+
+def sample_context():
+    user = SimpleNamespace(
+        nick_name="Alex",
+        full_name="Alex Morgan",
+        email="alex@example.com",
+    )
+    transaction = SimpleNamespace(
+        amount=Decimal("2500.00"),
+        currency="USD",
+        get_payment_method_display="Crypto",
+        get_status_display="Pending",
+        wallet_id="0x9f3c",
+        timestamp=datetime.now(),
+        note="",
+    )
+    return {
+        "user": user,
+        "transaction": transaction,
+        "otp": "482913",
+        "verification_url": "https://example.com/account/verify/abc/def/",
+        "reset_url": "https://example.com/account/reset/abc/def/",
+        "reason": "Document is unreadable.",
+        "site_name": settings.SITE_NAME,
+        "year": datetime.now().year,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-message render cost of render_to_string + strip_tags "
+        "against the cached render_email."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "templates",
+            nargs="*",
+            default=[
+                "notification/emails/login_otp.html",
+                "notification/emails/verify_email.html",
+                "notification/emails/admin_deposit_request.html",
+            ],
+        )
+        parser.add_argument("--iterations", type=int, default=2000)
+        parser.add_argument(
+            "--show-text",
+            action="store_true",
+            help="Print the plain-text body render_email produces.",
+        )
+
+    def _time(self, fn, iterations):
+        fn()  # warm up template loaders
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        return (time.perf_counter() - start) / iterations * 1_000_000
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING(
+                "DEBUG is on: render_email bypasses its cache, numbers will not be representative."
+            ))
+
+        iterations = options["iterations"]
+        context = sample_context()
+        clear_cache()
+
+        self.stdout.write(f"{'template':<48} {'legacy us':>10} {'cached us':>10} {'speedup':>8}")
+        for template_name in options["templates"]:
+            def legacy():
+                html_content = render_to_string(template_name, context)
+                return html_content, strip_tags(html_content)
+
+            def cached():
+                return render_email(template_name, context)
+
+            legacy_us = self._time(legacy, iterations)
+            cached_us = self._time(cached, iterations)
+            self.stdout.write(
+                f"{template_name:<48} {legacy_us:>10.1f} {cached_us:>10.1f} "
+                f"{legacy_us / cached_us:>7.1f}x"
+            )
+
+            if options["show_text"]:
+                self.stdout.write(render_email(template_name, context)[1])
+                self.stdout.write("")
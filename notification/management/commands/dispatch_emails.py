@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notification.outbox import dispatch_outbox
+
+
+class Command(BaseCommand):
+    help = "Send queued emails from the outbox. Use --loop to run as a worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting when it is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polls in --loop mode.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            totals = dispatch_outbox(batch_size=options["batch_size"])
+            if totals["sent"] or totals["failed"] or not options["loop"]:
+                self.stdout.write(
+                    f"Sent {totals['sent']} emails, {totals['failed']} failed "
+                    f"({totals['dead']} moved to dead letters)"
+                )
+            if totals["circuit_open"]:
+                self.stdout.write(self.style.WARNING("Email circuit is open; sending paused."))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from notification.digest import send_admin_digest
+
+
+class Command(BaseCommand):
+    help = "Queue the admin activity digest for events since the last one."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Send now even if the digest window has not elapsed.",
+        )
+
+    def handle(self, *args, **options):
+        result = send_admin_digest(force=options["force"])
+        self.stdout.write(f"Digest covered {result['events']} events")
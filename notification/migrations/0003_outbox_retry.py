@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-19 12:26
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def requeue_failed(apps, schema_editor):
+    # 'failed' rows were never retried; give them a fresh set of attempts
+    EmailOutbox = apps.get_model('notification', 'EmailOutbox')
+    EmailOutbox.objects.filter(status='failed').update(status='pending')
+
+
+class Migration(migrations.Migration):
+    # CockroachDB does not allow writes and schema changes in one transaction
+    atomic = False
+
+    dependencies = [
+        ('notification', '0002_adminevent'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='emailoutbox',
+            name='outbox_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='emailoutbox',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('dead', 'Dead')], default='pending', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='emailoutbox',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['next_attempt_at'], name='outbox_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailoutbox',
+            index=models.Index(condition=models.Q(('status', 'dead')), fields=['-created_at'], name='outbox_dead_idx'),
+        ),
+        migrations.RunPython(requeue_failed, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,103 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class EmailOutbox(models.Model):
+    """
+    Rendered email waiting to be handed to the email backend.
+    Rows are written in the caller's transaction and sent by
+    ``notification.outbox.dispatch_outbox``.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    # gave up after EMAIL_OUTBOX_MAX_ATTEMPTS; shown to staff for retry
+    STATUS_DEAD = 'dead'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_DEAD, 'Dead'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    to_email = models.JSONField(default=list)
+    from_email = models.CharField(max_length=255)
+    html_body = models.TextField()
+    text_body = models.TextField()
+    template_name = models.CharField(max_length=255, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # set by the dispatcher run that is sending the row
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                name='outbox_due_idx',
+                condition=models.Q(status='pending'),
+            ),
+            models.Index(fields=['claim_token'], name='outbox_claim_idx'),
+            models.Index(
+                fields=['-created_at'],
+                name='outbox_dead_idx',
+                condition=models.Q(status='dead'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to_email)} ({self.status})"
+
+
+class AdminEvent(models.Model):
+    """
+    Something staff should hear about (new registration, deposit request).
+    Collected into one digest email per ADMIN_DIGEST_WINDOW_MINUTES.
+    """
+    NEW_USER = 'new_user'
+    DEPOSIT_REQUEST = 'deposit_request'
+
+    EVENT_CHOICES = [
+        (NEW_USER, 'New registration'),
+        (DEPOSIT_REQUEST, 'Deposit request'),
+    ]
+
+    event_type = models.CharField(max_length=30, choices=EVENT_CHOICES)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='admin_events'
+    )
+    amount = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True)
+    summary = models.CharField(max_length=255)
+    # path of the staff page to act on the event
+    url = models.CharField(max_length=255, blank=True)
+    sent_immediately = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+    digested_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['created_at'],
+                name='admin_event_pending_idx',
+                condition=models.Q(digested_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_type_display()}: {self.summary}"
@@ -0,0 +1,292 @@
+"""
+Transactional email outbox.
+
+Request handlers call ``queue_html_email`` which renders the message and
+stores it in ``EmailOutbox`` inside the current database transaction, so
+the email is sent only if the surrounding write commits. The dispatcher
+(``manage.py dispatch_emails`` or the ``dispatch-emails`` cron job) drains
+the table in batches over a single open backend connection.
+
+Time-critical messages (OTP codes, email verification, password reset)
+are queued with ``send_now=True``: the row is sent as soon as the
+transaction commits instead of waiting up to a minute for the cron job,
+which stays the retry path if that immediate send fails.
+
+A failed send is retried with exponential backoff and moved to the
+``dead`` status after EMAIL_OUTBOX_MAX_ATTEMPTS; staff can requeue dead
+emails from the staff email outbox page. A circuit breaker stops the
+dispatcher from hammering the provider while it keeps failing.
+"""
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+from .rendering import render_email
+
+logger = logging.getLogger(__name__)
+
+
+def queue_html_email(
+    subject: str,
+    to_email: list[str],
+    template_name: str,
+    context: dict,
+    from_email: str | None = None,
+    fail_silently: bool = False,
+    send_now: bool = False,
+):
+    """
+    Queue an email with both HTML and plain-text content.
+
+    Takes the same arguments as ``send_html_email``. The template is
+    rendered now, while the context objects are at hand; delivery
+    happens later in the dispatcher, or right after the current
+    transaction commits with ``send_now``. ``fail_silently`` is accepted
+    for compatibility; delivery errors are recorded on the outbox row.
+    """
+    html_content, text_content = render_email(template_name, context)
+
+    row = EmailOutbox.objects.create(
+        subject=subject,
+        to_email=list(to_email),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        html_body=html_content,
+        text_body=text_content,
+        template_name=template_name,
+    )
+    if send_now:
+        transaction.on_commit(lambda: send_queued_email(row.pk))
+    return row
+
+
+def _claim_batch(batch_size):
+    """
+    Mark up to ``batch_size`` pending rows as sending and return them.
+    The claim token keeps concurrent dispatchers from sending the same row.
+    """
+    ids = list(
+        EmailOutbox.objects
+        .filter(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+        .order_by('next_attempt_at')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    return _claim(ids)
+
+
+def _claim(ids):
+    """Mark the given rows as sending if they are still pending and return them."""
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    EmailOutbox.objects.filter(
+        pk__in=ids,
+        status=EmailOutbox.STATUS_PENDING,
+    ).update(status=EmailOutbox.STATUS_SENDING, claim_token=token, claimed_at=now)
+
+    return list(EmailOutbox.objects.filter(claim_token=token))
+
+
+def release_stale_claims():
+    """
+    Return rows left in ``sending`` by a dispatcher that died mid-batch.
+    """
+    cutoff = timezone.now() - timedelta(
+        minutes=getattr(settings, 'EMAIL_OUTBOX_CLAIM_TIMEOUT_MINUTES', 10)
+    )
+    return EmailOutbox.objects.filter(
+        status=EmailOutbox.STATUS_SENDING,
+        claimed_at__lt=cutoff,
+    ).update(status=EmailOutbox.STATUS_PENDING, claim_token='')
+
+
+CIRCUIT_OPEN_KEY = "email_outbox:circuit_open"
+CIRCUIT_FAILURES_KEY = "email_outbox:consecutive_failures"
+
+
+def circuit_is_open():
+    return cache.get(CIRCUIT_OPEN_KEY) is not None
+
+
+def _record_success():
+    cache.delete(CIRCUIT_FAILURES_KEY)
+
+
+def _record_failure():
+    """
+    Count a consecutive failure; open the circuit at the threshold.
+    Returns True if the circuit is now open.
+    """
+    threshold = getattr(settings, 'EMAIL_CIRCUIT_FAILURE_THRESHOLD', 5)
+    try:
+        failures = cache.incr(CIRCUIT_FAILURES_KEY)
+    except ValueError:
+        cache.set(CIRCUIT_FAILURES_KEY, 1, timeout=None)
+        failures = 1
+
+    if failures < threshold:
+        return False
+
+    reset_seconds = getattr(settings, 'EMAIL_CIRCUIT_RESET_SECONDS', 120)
+    cache.set(CIRCUIT_OPEN_KEY, timezone.now().isoformat(), timeout=reset_seconds)
+    # half-open after the reset: a single failure reopens the circuit
+    cache.set(CIRCUIT_FAILURES_KEY, threshold - 1, timeout=None)
+    logger.error("Email circuit opened after %s consecutive failures", failures)
+    return True
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for the given attempt count."""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 60)
+    cap = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600)
+    delay = min(cap, base * (2 ** (attempts - 1)))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def _mark_failed(row, now):
+    row.attempts += 1
+    row.last_error = traceback.format_exc()
+    row.claim_token = ''
+    if row.attempts >= getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6):
+        row.status = EmailOutbox.STATUS_DEAD
+    else:
+        row.status = EmailOutbox.STATUS_PENDING
+        row.next_attempt_at = now + retry_delay(row.attempts)
+
+
+def requeue_dead(ids=None):
+    """Give dead emails (all, or the given ids) a fresh set of attempts."""
+    rows = EmailOutbox.objects.filter(status=EmailOutbox.STATUS_DEAD)
+    if ids is not None:
+        rows = rows.filter(pk__in=ids)
+    return rows.update(
+        status=EmailOutbox.STATUS_PENDING,
+        attempts=0,
+        next_attempt_at=timezone.now(),
+        claim_token='',
+    )
+
+
+def _build_message(row, connection):
+    email = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.text_body,
+        from_email=row.from_email,
+        to=row.to_email,
+        connection=connection,
+    )
+    email.attach_alternative(row.html_body, "text/html")
+    return email
+
+
+def _send_rows(rows, connection, totals):
+    """
+    Send claimed rows over ``connection`` and record the outcome of each
+    on its row. Adds to the ``totals`` counters of ``dispatch_outbox``.
+    """
+    sent_ids = []
+    failed = []
+    unsent_ids = []
+    for row in rows:
+        if totals["circuit_open"]:
+            unsent_ids.append(row.pk)
+            continue
+        try:
+            connection.send_messages([_build_message(row, connection)])
+            sent_ids.append(row.pk)
+            _record_success()
+        except Exception as e:
+            logger.warning("Outbox email %s failed (attempt %s): %s", row.pk, row.attempts + 1, e)
+            _mark_failed(row, timezone.now())
+            failed.append(row)
+            totals["circuit_open"] = _record_failure()
+
+    EmailOutbox.objects.filter(pk__in=sent_ids).update(
+        status=EmailOutbox.STATUS_SENT,
+        sent_at=timezone.now(),
+    )
+    EmailOutbox.objects.bulk_update(
+        failed,
+        ['status', 'attempts', 'next_attempt_at', 'last_error', 'claim_token'],
+    )
+    EmailOutbox.objects.filter(pk__in=unsent_ids).update(
+        status=EmailOutbox.STATUS_PENDING,
+        claim_token='',
+    )
+
+    totals["sent"] += len(sent_ids)
+    totals["failed"] += len(failed)
+    totals["dead"] += sum(1 for row in failed if row.status == EmailOutbox.STATUS_DEAD)
+
+
+def send_queued_email(row_id):
+    """
+    Send one pending outbox row now, outside the batch dispatcher. If the
+    circuit is open, the row is already claimed or sending fails, it is
+    left to the ``dispatch-emails`` cron job. Never raises.
+    """
+    totals = {"sent": 0, "failed": 0, "dead": 0, "circuit_open": circuit_is_open()}
+    if totals["circuit_open"]:
+        return totals
+
+    try:
+        rows = _claim([row_id])
+        if rows:
+            connection = get_connection(fail_silently=False)
+            try:
+                _send_rows(rows, connection, totals)
+            finally:
+                connection.close()
+    except Exception:
+        print(f"\nOUTBOX SEND ERROR (email {row_id}):")
+        traceback.print_exc()
+    return totals
+
+
+def dispatch_outbox(batch_size=None, max_batches=None):
+    """
+    Send due outbox rows. Returns ``{"sent": n, "failed": n, "dead": n,
+    "circuit_open": bool}``.
+
+    All batches share one backend connection (one HTTP session for API
+    backends, one SMTP login for SMTP). A failing message is scheduled
+    for a retry without stopping the rest of the batch. If the circuit
+    opens, the rest of the claimed rows go back to pending untouched.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+    totals = {"sent": 0, "failed": 0, "dead": 0, "circuit_open": False}
+
+    if circuit_is_open():
+        totals["circuit_open"] = True
+        return totals
+
+    release_stale_claims()
+
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    try:
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            rows = _claim_batch(batch_size)
+            if not rows:
+                break
+            batches += 1
+
+            _send_rows(rows, connection, totals)
+
+            if totals["circuit_open"]:
+                break
+    finally:
+        connection.close()
+
+    return totals
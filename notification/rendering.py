@@ -0,0 +1,103 @@
+"""
+Email rendering with cached templates.
+
+``render_email`` returns the HTML and plain-text bodies for an email
+template. The compiled HTML template and a plain-text template derived
+from it are built once per process and reused; each send then only
+renders the two templates against one shared context, instead of
+rendering the HTML and running ``strip_tags`` over the whole layout.
+
+The text template is derived from the ``content`` block of the email
+template: markup is removed, links become "label: url", and the header,
+footer and inline styles of the layout are left out.
+"""
+import html
+import re
+import threading
+
+from django.conf import settings
+from django.template import Context, engines
+from django.utils.html import strip_tags
+
+_cache_lock = threading.Lock()
+_compiled = {}
+
+_EXTENDS_RE = re.compile(r"{%\s*extends\s+[^%]*%}")
+_BLOCK_RE = re.compile(
+    r"{%\s*block\s+(\w+)\s*%}(.*?){%\s*endblock(?:\s+\w+)?\s*%}", re.DOTALL
+)
+_LINK_RE = re.compile(r"<a\b[^>]*?href=\"([^\"]*)\"[^>]*>(.*?)</a>", re.DOTALL | re.IGNORECASE)
+_BLOCK_END_RE = re.compile(r"</(p|tr|table|h\d|div|li)>|<br\s*/?>", re.IGNORECASE)
+_BLANK_LINES_RE = re.compile(r"\n\s*\n\s*(\n\s*)+")
+
+
+def _engine():
+    return engines["django"].engine
+
+
+def _link_to_text(match):
+    url = match.group(1).strip()
+    label = " ".join(strip_tags(match.group(2)).split())
+    if not label or label == url:
+        return url
+    return f"{label}: {url}"
+
+
+def text_source(template_source):
+    """
+    Turn the source of an email template into the source of its
+    plain-text counterpart. Template tags and variables are kept.
+    """
+    blocks = dict(_BLOCK_RE.findall(template_source))
+    if _EXTENDS_RE.search(template_source) and "content" in blocks:
+        source = blocks["content"]
+    else:
+        source = template_source
+
+    source = _LINK_RE.sub(_link_to_text, source)
+    source = _BLOCK_END_RE.sub(lambda m: m.group(0) + "\n", source)
+    source = html.unescape(strip_tags(source))
+
+    lines = [line.strip() for line in source.splitlines()]
+    return "{% autoescape off %}" + "\n".join(lines) + "{% endautoescape %}"
+
+
+def _compile(template_name):
+    engine = _engine()
+    html_template = engine.get_template(template_name)
+    text_template = engine.from_string(text_source(html_template.source))
+    return html_template, text_template
+
+
+def get_email_templates(template_name):
+    """
+    Return the compiled ``(html_template, text_template)`` pair.
+    Cached per process; rebuilt on every call when DEBUG is on so
+    template edits show up without a restart.
+    """
+    if settings.DEBUG:
+        return _compile(template_name)
+
+    templates = _compiled.get(template_name)
+    if templates is None:
+        with _cache_lock:
+            templates = _compiled.get(template_name)
+            if templates is None:
+                templates = _compiled[template_name] = _compile(template_name)
+    return templates
+
+
+def clear_cache():
+    with _cache_lock:
+        _compiled.clear()
+
+
+def render_email(template_name, context):
+    """Render ``(html, text)`` for an email template from one context."""
+    html_template, text_template = get_email_templates(template_name)
+
+    ctx = Context(context)
+    html_content = html_template.render(ctx)
+    text_content = text_template.render(ctx)
+
+    return html_content, _BLANK_LINES_RE.sub("\n\n", text_content).strip()
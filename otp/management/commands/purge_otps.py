@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from otp.models import OTP
+from otp.utils import purge_expired_otps, purgeable_otps_filter
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete used and expired OTP rows older than the retention period, "
+        "in small batches so each delete is a short transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-hours",
+            type=float,
+            default=getattr(settings, "OTP_RETENTION_HOURS", 24),
+            help="Keep used/expired codes this long for auditing (default: OTP_RETENTION_HOURS).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--max-batches", type=int, default=None)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to sleep between batches to leave room for live traffic.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the rows that would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            count = OTP.objects.filter(
+                purgeable_otps_filter(options["retention_hours"])
+            ).count()
+            self.stdout.write(f"{count} OTP rows would be deleted")
+            return
+
+        stats = purge_expired_otps(
+            retention_hours=options["retention_hours"],
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+            pause=options["pause"],
+        )
+        rate = stats["deleted"] / stats["seconds"] if stats["seconds"] else 0
+        self.stdout.write(
+            f"Deleted {stats['deleted']} OTP rows in {stats['batches']} batches, "
+            f"{stats['seconds']}s ({rate:.0f} rows/s)"
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('otp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(condition=models.Q(('is_used', False)), fields=['user', 'otp_type', 'code'], name='otp_unused_idx'),
+        ),
+    ]
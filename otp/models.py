@@ -12,6 +12,15 @@ class OTP(models.Model):
         ('2fa', 'Two-Factor Auth'),
     ]
 
+    # how long each type of code stays valid
+    EXPIRY_MINUTES = {
+        'login': 10,
+        'password_reset': 15,
+        'email_verify': 24*60,
+        '2fa': 5,
+    }
+    DEFAULT_EXPIRY_MINUTES = 10
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     code = models.CharField(max_length=6)
     otp_type = models.CharField(max_length=50, choices=OTP_TYPE_CHOICES)
@@ -21,20 +30,25 @@ class OTP(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['user', 'otp_type']),
+            # code lookup / consume only ever looks at unused codes
+            models.Index(
+                fields=['user', 'otp_type', 'code'],
+                name='otp_unused_idx',
+                condition=models.Q(is_used=False),
+            ),
         ]
 
+    @classmethod
+    def expiry_minutes_for(cls, otp_type):
+        return cls.EXPIRY_MINUTES.get(otp_type, cls.DEFAULT_EXPIRY_MINUTES)
+
     def is_expired(self):
-        expiry_minutes = {
-            'login': 10,
-            'password_reset': 15,
-            'email_verify': 24*60,
-            '2fa': 5,
-        }.get(self.otp_type, 10)
+        expiry_minutes = self.expiry_minutes_for(self.otp_type)
         return timezone.now() > self.created_at + timezone.timedelta(minutes=expiry_minutes)
 
     def mark_used(self):
         self.is_used = True
-        self.save()
+        self.save(update_fields=['is_used'])
 
     # def mark_used(self):
     #     self.delete()
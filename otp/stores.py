@@ -0,0 +1,109 @@
+"""
+Where one-time passwords live between issue and use.
+
+``CacheOTPStore`` keeps the current code for a (user, type) pair under one
+cache key whose TTL is the code's lifetime, so issuing a code is a single
+write (which also replaces any previous code) and verifying it is a read
+plus a delete. It needs a cache shared by every web process, e.g. Redis.
+How often codes may be issued is limited separately, in ``otp.utils``.
+
+``DatabaseOTPStore`` is the original behaviour: a row per code in the OTP
+table. It is the default when no shared cache is configured, and with
+OTP_AUDIT_TO_DB the cache store also records codes there for auditing.
+
+Pick one with the OTP_STORE setting (dotted path).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+from .models import OTP
+
+
+class IssuedOTP:
+    """A code handed out by a store that does not keep OTP rows."""
+
+    def __init__(self, user_id, otp_type, code):
+        self.user_id = user_id
+        self.otp_type = otp_type
+        self.code = code
+        self.created_at = timezone.now()
+
+    def __str__(self):
+        return f"{self.otp_type.upper()} OTP for user {self.user_id}"
+
+
+class DatabaseOTPStore:
+
+    def issue(self, user, otp_type, code):
+        # Invalidate previous unused OTPs
+        OTP.objects.filter(
+            user=user,
+            otp_type=otp_type,
+            is_used=False
+        ).update(is_used=True)
+
+        return OTP.objects.create(user=user, code=code, otp_type=otp_type)
+
+    def consume(self, user, code, otp_type):
+        # One conditional UPDATE: checks, expires and consumes the code in
+        # a single indexed statement, so two requests can't both use it.
+        cutoff = timezone.now() - timezone.timedelta(
+            minutes=OTP.expiry_minutes_for(otp_type)
+        )
+        return OTP.objects.filter(
+            user=user,
+            code=code,
+            otp_type=otp_type,
+            is_used=False,
+            created_at__gte=cutoff,
+        ).update(is_used=True) > 0
+
+
+class CacheOTPStore:
+
+    def _code_key(self, user, otp_type):
+        return f"otp:code:{otp_type}:{user.pk}"
+
+    def issue(self, user, otp_type, code):
+        # overwriting the key invalidates any earlier code
+        cache.set(
+            self._code_key(user, otp_type),
+            code,
+            timeout=OTP.expiry_minutes_for(otp_type) * 60,
+        )
+
+        if getattr(settings, 'OTP_AUDIT_TO_DB', False):
+            return OTP.objects.create(user=user, code=code, otp_type=otp_type)
+        return IssuedOTP(user.pk, otp_type, code)
+
+    def consume(self, user, code, otp_type):
+        key = self._code_key(user, otp_type)
+        expected = cache.get(key)
+
+        if expected is None or not constant_time_compare(expected, code or ""):
+            return False
+
+        # only one concurrent request gets True from delete()
+        if not cache.delete(key):
+            return False
+
+        if getattr(settings, 'OTP_AUDIT_TO_DB', False):
+            OTP.objects.filter(
+                user=user, code=code, otp_type=otp_type, is_used=False
+            ).update(is_used=True)
+        return True
+
+
+_store = None
+
+
+def get_otp_store():
+    global _store
+    if _store is None:
+        _store = import_string(
+            getattr(settings, 'OTP_STORE', 'otp.stores.DatabaseOTPStore')
+        )()
+    return _store
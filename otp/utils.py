@@ -1,9 +1,15 @@
 import random
-from django.utils import timezone
+import time
 from datetime import timedelta
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.utils import timezone
 
+from base.db import atomic_retry
+from base.ratelimit import is_allowed
 from .models import OTP
+from .stores import get_otp_store
 
 MAX_OTP_PER_WINDOW = 3
 OTP_WINDOW_MINUTES = 10
@@ -11,41 +17,83 @@ OTP_WINDOW_MINUTES = 10
 def can_send_otp(user, otp_type):
     """
     Check if user can receive another OTP within the time window.
+    Counts this attempt; a cache counter rather than counting OTP rows.
     """
-    window_start = timezone.now() - timedelta(minutes=OTP_WINDOW_MINUTES)
-
-    recent_count = OTP.objects.filter(
-        user=user,
-        otp_type=otp_type,
-        created_at__gte=window_start
-    ).count()
-
-    return recent_count < MAX_OTP_PER_WINDOW
+    return is_allowed(
+        f"otp:{otp_type}:{user.pk}",
+        MAX_OTP_PER_WINDOW,
+        OTP_WINDOW_MINUTES * 60,
+    )
 
 def generate_otp_code(length=6):
     """Generate a numeric OTP of given length."""
     return ''.join([str(random.randint(0, 9)) for _ in range(length)])
 
 def create_otp(user, otp_type):
+    """Issue a new code (replacing any unused one). The result has ``.code``."""
     if not can_send_otp(user, otp_type):
         raise PermissionDenied("OTP resend limit exceeded")
-    
-    # Invalidate previous unused OTPs
-    OTP.objects.filter(
-        user=user,
-        otp_type=otp_type,
-        is_used=False
-    ).update(is_used=True)
 
-    code = generate_otp_code()
-    return OTP.objects.create(user=user, code=code, otp_type=otp_type)
+    return get_otp_store().issue(user, otp_type, generate_otp_code())
 
 def verify_otp(user, code, otp_type):
     """Verify OTP code, mark used if valid."""
-    otp_obj = OTP.objects.filter(user=user, code=code, otp_type=otp_type, is_used=False).first()
-    if not otp_obj or otp_obj.is_expired():
-        return False
-    otp_obj.mark_used()
-    return True
+    return get_otp_store().consume(user, code, otp_type)
+
+
+def purgeable_otps_filter(retention_hours):
+    """
+    Used codes, and codes past their expiry, that are older than the
+    retention period.
+    """
+    now = timezone.now()
+    retention = timedelta(hours=retention_hours)
+
+    condition = Q(is_used=True, created_at__lt=now - retention)
+    for otp_type, minutes in OTP.EXPIRY_MINUTES.items():
+        condition |= Q(otp_type=otp_type, created_at__lt=now - retention - timedelta(minutes=minutes))
+    condition |= (
+        ~Q(otp_type__in=list(OTP.EXPIRY_MINUTES))
+        & Q(created_at__lt=now - retention - timedelta(minutes=OTP.DEFAULT_EXPIRY_MINUTES))
+    )
+    return condition
+
+
+@atomic_retry
+def _delete_otp_batch(ids):
+    deleted, _ = OTP.objects.filter(pk__in=ids).delete()
+    return deleted
+
+
+def purge_expired_otps(retention_hours=None, batch_size=1000, max_batches=None, pause=0):
+    """
+    Delete purgeable OTP rows in primary-key order, ``batch_size`` rows
+    per short transaction. Returns throughput stats.
+    """
+    if retention_hours is None:
+        retention_hours = getattr(settings, 'OTP_RETENTION_HOURS', 24)
+
+    condition = purgeable_otps_filter(retention_hours)
+    stats = {"deleted": 0, "batches": 0, "seconds": 0.0}
+    started = time.monotonic()
+    last_id = 0
+
+    while max_batches is None or stats["batches"] < max_batches:
+        ids = list(
+            OTP.objects
+            .filter(condition, pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+
+        stats["deleted"] += _delete_otp_batch(ids)
+        stats["batches"] += 1
+        last_id = ids[-1]
 
+        if pause:
+            time.sleep(pause)
 
+    stats["seconds"] = round(time.monotonic() - started, 3)
+    return stats
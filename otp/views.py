@@ -9,8 +9,18 @@ from django.conf import settings
 
 from account.models import User
 from .utils import verify_otp, create_otp
-from notification.email_utils import send_html_email
+from notification.outbox import queue_html_email
+from base.ratelimit import ratelimit
 
+
+def _otp_session_user(request):
+    user_id = request.session.get('otp_user_id')
+    return str(user_id) if user_id else None
+
+
+# 6-digit codes: cap guesses per pending login
+@ratelimit(key=_otp_session_user, rate="5/10m", group="otp_verify",
+           message="Too many incorrect codes. Please wait a few minutes and try again.")
 def login_verify_otp_view(request):
     user_id = request.session.get('otp_user_id')
     if not user_id:
@@ -31,6 +41,8 @@ def login_verify_otp_view(request):
     return render(request, 'otp/login_verify_otp.html', {"user": user})
 
 
+@ratelimit(key="ip", rate="10/10m", group="otp_resend", methods=("GET", "POST"),
+           redirect_to="otp:login_verify_otp")
 def resend_otp_view(request):
     user_id = request.session.get('otp_user_id')
     if not user_id:
@@ -53,7 +65,7 @@ def resend_otp_view(request):
 
     try:
         # print(otp_obj.code)
-        send_html_email(
+        queue_html_email(
             subject="Your Login OTP",
             to_email=[user.email],
             template_name="notification/emails/login_otp.html",
@@ -63,6 +75,7 @@ def resend_otp_view(request):
                     "site_name": settings.SITE_NAME,
                     "year": datetime.now().year,
                 },
+            send_now=True,
         )
         messages.success(request, "A new OTP has been sent to your email.")
     except Exception:
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plan', '0009_alter_orderplan_yield_percent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderplan',
+            index=models.Index(fields=['portfolio', '-created_at'], name='orderplan_portfolio_idx'),
+        ),
+    ]
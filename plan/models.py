@@ -110,6 +110,8 @@ class OrderPlan(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['status', 'start_at']),
+            # staff customer detail, newest first
+            models.Index(fields=['portfolio', '-created_at'], name='orderplan_portfolio_idx'),
         ]
 
     def __str__(self):
@@ -0,0 +1,232 @@
+"""
+Daily rollups behind the staff analytics page.
+
+``refresh_rollups`` (``manage.py refresh_rollups`` or the
+``refresh-rollups`` cron job) recomputes, from the transactional tables:
+
+* ``DailyFlowRollup`` for the last ANALYTICS_REFRESH_DAYS days, plus any
+  older day that still has pending transactions (approving or declining
+  one changes that day's figures) or was marked dirty by
+  ``mark_flow_days_dirty`` because a backdated transaction was written;
+* ``DailyAUMRollup`` for today. AUM is a point-in-time figure, so each
+  day's row keeps the last value computed on that day.
+
+Each day is replaced in its own short transaction. The analytics page
+only ever reads the rollup tables.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from base.db import atomic_retry
+from plan.models import Plan, OrderPlan
+from transaction.models import Transaction
+from .models import DailyFlowRollup, DailyAUMRollup, DirtyFlowDay
+
+ZERO = Decimal('0.00')
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _refresh_window_start():
+    days = getattr(settings, 'ANALYTICS_REFRESH_DAYS', 7)
+    return timezone.localdate() - timedelta(days=days - 1)
+
+
+def mark_flow_days_dirty(timestamps):
+    """
+    Queue the days of ``timestamps`` that fall before the refresh window
+    for the next ``refresh_rollups``. Call it in the same transaction
+    that writes the transactions.
+    """
+    window_start = _refresh_window_start()
+    days = {timezone.localdate(ts) for ts in timestamps}
+    old_days = sorted(day for day in days if day < window_start)
+    if old_days:
+        DirtyFlowDay.objects.bulk_create(
+            [DirtyFlowDay(date=day) for day in old_days], ignore_conflicts=True
+        )
+    return len(old_days)
+
+
+@atomic_retry
+def _refresh_flow_day(day):
+    rows = (
+        Transaction.objects
+        .filter(timestamp__gte=_day_start(day), timestamp__lt=_day_start(day + timedelta(days=1)))
+        .order_by()
+        .values('transaction_type', 'status', 'currency')
+        .annotate(count=Count('id'), total=Sum('amount'))
+    )
+    rollups = [
+        DailyFlowRollup(
+            date=day,
+            transaction_type=row['transaction_type'],
+            status=row['status'],
+            currency=row['currency'] or '',
+            count=row['count'],
+            total=row['total'] or ZERO,
+        )
+        for row in rows
+    ]
+
+    DailyFlowRollup.objects.filter(date=day).delete()
+    DailyFlowRollup.objects.bulk_create(rollups)
+    # same transaction as the read above, so a mark made concurrently
+    # either is seen here or survives for the next run
+    DirtyFlowDay.objects.filter(date=day).delete()
+    return len(rollups)
+
+
+@atomic_retry
+def _refresh_aum_day(day):
+    open_statuses = [OrderPlan.STATUS_ACTIVE, OrderPlan.STATUS_PAUSED]
+    rows = (
+        OrderPlan.objects
+        .filter(status__in=open_statuses)
+        .order_by()
+        .values('plan__plantype')
+        .annotate(
+            aum=Sum('current_value'),
+            active_orders=Count('id', filter=Q(status=OrderPlan.STATUS_ACTIVE)),
+        )
+    )
+    rollups = [
+        DailyAUMRollup(
+            date=day,
+            plantype=row['plan__plantype'],
+            aum=row['aum'] or ZERO,
+            active_orders=row['active_orders'],
+        )
+        for row in rows
+    ]
+
+    DailyAUMRollup.objects.filter(date=day).delete()
+    DailyAUMRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+def refresh_rollups(days=None):
+    """
+    Recompute the recent flow days, older days with pending or
+    backdated transactions, and today's AUM. Returns counts for the
+    cron log.
+    """
+    if days is None:
+        days = getattr(settings, 'ANALYTICS_REFRESH_DAYS', 7)
+
+    today = timezone.localdate()
+    recent = [today - timedelta(days=n) for n in range(days)]
+
+    stale = set(
+        DailyFlowRollup.objects
+        .filter(status='PENDING', date__lt=recent[-1])
+        .values_list('date', flat=True)
+    )
+    stale.update(DirtyFlowDay.objects.filter(date__lt=recent[-1]).values_list('date', flat=True))
+
+    flow_rows = 0
+    flow_days = sorted(stale) + sorted(recent)
+    for day in flow_days:
+        flow_rows += _refresh_flow_day(day)
+
+    aum_rows = _refresh_aum_day(today)
+
+    return {"flow_days": len(flow_days), "flow_rows": flow_rows, "aum_rows": aum_rows}
+
+
+def backfill_flow_rollups(since):
+    """Build flow rollups for every day from ``since`` to today."""
+    day = since
+    today = timezone.localdate()
+    rows = 0
+    while day <= today:
+        rows += _refresh_flow_day(day)
+        day += timedelta(days=1)
+    return rows
+
+
+def analytics_summary(trend_days=14):
+    """Figures for the staff analytics page, read from the rollups only."""
+    today = timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+    trend_start = today - timedelta(days=trend_days - 1)
+
+    latest_aum = DailyAUMRollup.objects.order_by('-date').values_list('date', flat=True).first()
+    plan_labels = dict(Plan.PlanType.choices)
+    aum_by_type = [
+        {
+            "plantype": plan_labels.get(row.plantype, row.plantype),
+            "aum": row.aum,
+            "active_orders": row.active_orders,
+        }
+        for row in DailyAUMRollup.objects.filter(date=latest_aum).order_by('-aum')
+    ] if latest_aum else []
+
+    succeeded = DailyFlowRollup.objects.filter(status='SUCCESSFUL')
+    week = succeeded.filter(date__gte=week_start).aggregate(
+        deposits=Sum('total', filter=Q(transaction_type='DEPOSIT')),
+        withdrawals=Sum('total', filter=Q(transaction_type='WITHDRAW')),
+    )
+    deposits = week['deposits'] or ZERO
+    withdrawals = week['withdrawals'] or ZERO
+
+    pending = DailyFlowRollup.objects.filter(status='PENDING').aggregate(
+        withdraw_total=Sum('total', filter=Q(transaction_type='WITHDRAW')),
+        withdraw_count=Sum('count', filter=Q(transaction_type='WITHDRAW')),
+        deposit_total=Sum('total', filter=Q(transaction_type='DEPOSIT')),
+        deposit_count=Sum('count', filter=Q(transaction_type='DEPOSIT')),
+    )
+
+    daily = {
+        row['date']: row
+        for row in (
+            succeeded
+            .filter(date__gte=trend_start)
+            .values('date')
+            .annotate(
+                deposits=Sum('total', filter=Q(transaction_type='DEPOSIT')),
+                withdrawals=Sum('total', filter=Q(transaction_type='WITHDRAW')),
+            )
+        )
+    }
+    trend = []
+    for n in range(trend_days):
+        day = today - timedelta(days=n)
+        row = daily.get(day, {})
+        day_deposits = row.get('deposits') or ZERO
+        day_withdrawals = row.get('withdrawals') or ZERO
+        trend.append({
+            "date": day,
+            "deposits": day_deposits,
+            "withdrawals": day_withdrawals,
+            "net": day_deposits - day_withdrawals,
+        })
+
+    # every refresh rewrites today's AUM rows
+    refreshed_at = (
+        DailyAUMRollup.objects.filter(date=latest_aum).order_by('-updated_at')
+        .values_list('updated_at', flat=True).first()
+    )
+
+    return {
+        "aum_date": latest_aum,
+        "aum_by_type": aum_by_type,
+        "aum_total": sum((row["aum"] for row in aum_by_type), ZERO),
+        "active_orders": sum(row["active_orders"] for row in aum_by_type),
+        "week_start": week_start,
+        "week_deposits": deposits,
+        "week_withdrawals": withdrawals,
+        "week_net": deposits - withdrawals,
+        "pending_withdrawals": pending['withdraw_total'] or ZERO,
+        "pending_withdrawal_count": pending['withdraw_count'] or 0,
+        "pending_deposits": pending['deposit_total'] or ZERO,
+        "pending_deposit_count": pending['deposit_count'] or 0,
+        "trend": trend,
+        "refreshed_at": refreshed_at,
+    }
@@ -0,0 +1,83 @@
+"""
+Staff audit trail.
+
+Views call ``record(request, action, target, changes)`` after a staff
+action succeeds. The entry is inserted straight away: inside an atomic
+block it commits or rolls back with the action, otherwise it is its own
+single-row INSERT. Views that act on many rows at once build the entries
+with ``entry()`` and write them in one insert with ``record_many``.
+
+Nothing is buffered in memory, because a serverless process can be
+frozen or recycled after the response and an audit trail cannot be
+best-effort. A failed insert raises like any other database error.
+
+    before = snapshot(order_plan, ["yield_percent"])
+    form.save()
+    record(request, "order_plan.update", order_plan,
+           diff(before, snapshot(order_plan, ["yield_percent"])))
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+from base.ratelimit import get_client_ip
+from .models import AuditLog
+
+
+def _json_value(value):
+    if isinstance(value, (Decimal, datetime, date)):
+        return str(value)
+    return value
+
+
+def snapshot(instance, fields):
+    """Current values of ``fields`` on ``instance``, JSON-ready."""
+    return {field: _json_value(getattr(instance, field)) for field in fields}
+
+
+def _blank(value):
+    return value is None or value == ""
+
+
+def diff(before, after):
+    """``{"field": [old, new]}`` for the fields that changed."""
+    return {
+        field: [before.get(field), value]
+        for field, value in after.items()
+        if before.get(field) != value
+        # a form saving "" into a NULL column is not a change
+        and not (_blank(before.get(field)) and _blank(value))
+    }
+
+
+def entry(request, action, target=None, changes=None, target_repr=None):
+    """
+    Unsaved AuditLog for ``action`` by ``request.user`` on ``target`` (a
+    model instance). ``target_repr`` defaults to "<model> #<pk>" so no
+    related rows are loaded just to describe the target.
+    """
+    actor = request.user if request.user.is_authenticated else None
+    log = AuditLog(
+        actor=actor,
+        actor_email=getattr(actor, "email", ""),
+        action=action,
+        changes=changes or {},
+        ip_address=get_client_ip(request) or None,
+        path=request.path[:255],
+    )
+    if target is not None:
+        log.target_type = target._meta.label_lower
+        log.target_id = str(target.pk)
+        log.target_repr = (target_repr or f"{target._meta.verbose_name} #{target.pk}")[:255]
+    return log
+
+
+def record(request, action, target=None, changes=None, target_repr=None):
+    """Write one audit entry; see ``entry`` for the arguments."""
+    log = entry(request, action, target, changes, target_repr)
+    log.save()
+    return log
+
+
+def record_many(entries):
+    """Write entries built with ``entry()`` in a single insert."""
+    return AuditLog.objects.bulk_create(entries)
@@ -0,0 +1,217 @@
+"""
+Background deletion of customers.
+
+``customer.delete()`` makes Django collect every dependent row into memory
+and delete them all in one transaction, which times out for long-lived
+accounts and holds locks across half the schema. Instead the staff view
+calls ``schedule_customer_deletion``, which deactivates and tombstones
+the user and queues a ``CustomerDeletionJob``.
+
+``run_deletion_jobs`` (``manage.py run_customer_deletions`` or the
+``delete-customers`` cron job) then works through ``_steps`` leaves
+first, deleting at most CUSTOMER_DELETION_BATCH_SIZE rows per short
+transaction and recording progress on the job. Every step selects "rows
+still left", so a job interrupted at any point simply carries on where
+it stopped. The user row goes last, through the ORM, by which time only
+a handful of rows still point at it.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from base.db import atomic_retry
+from account.models import User, KYC, VIPRequest
+from copytrade.models import CopyRelationship, CopyTrade
+from otp.models import OTP
+from plan.models import OrderPlan, OrderPlanItem, TransactionLog
+from transaction.models import Transaction, IdempotencyKey
+from .models import CustomerDeletionJob
+
+logger = logging.getLogger(__name__)
+
+
+def _steps(user_id, portfolio_id):
+    """
+    ``(name, queryset, null_field)`` in deletion order. With a
+    ``null_field`` the step clears that reference instead of deleting.
+    """
+    copy_relationships = Q(follower_id=portfolio_id) | Q(leader_id=portfolio_id)
+    return [
+        ("copy_trades", CopyTrade.objects.filter(
+            Q(follower_orderplan__portfolio_id=portfolio_id)
+            | Q(leader_orderplan__portfolio_id=portfolio_id)
+            | Q(relationship__follower_id=portfolio_id)
+            | Q(relationship__leader_id=portfolio_id)
+        ), None),
+        ("copy_last_orders", CopyRelationship.objects.filter(
+            last_copied_orderplan__portfolio_id=portfolio_id
+        ), "last_copied_orderplan"),
+        ("copy_relationships", CopyRelationship.objects.filter(copy_relationships), None),
+        ("order_plan_items", OrderPlanItem.objects.filter(order_plan__portfolio_id=portfolio_id), None),
+        ("order_plan_logs", TransactionLog.objects.filter(order_plan__portfolio_id=portfolio_id), None),
+        ("order_plans", OrderPlan.objects.filter(portfolio_id=portfolio_id), None),
+        ("transactions", Transaction.objects.filter(portfolio_id=portfolio_id), None),
+        ("kyc", KYC.objects.filter(portfolio_id=portfolio_id), None),
+        ("otps", OTP.objects.filter(user_id=user_id), None),
+        ("idempotency_keys", IdempotencyKey.objects.filter(user_id=user_id), None),
+        ("vip_requests", VIPRequest.objects.filter(user_id=user_id), None),
+    ]
+
+
+def schedule_customer_deletion(customer, requested_by=None):
+    """
+    Deactivate ``customer`` now and queue the rest. Returns the job
+    (the existing one if the customer is already being deleted).
+    """
+    with transaction.atomic():
+        existing = CustomerDeletionJob.objects.filter(
+            user=customer,
+            status__in=[CustomerDeletionJob.STATUS_PENDING, CustomerDeletionJob.STATUS_RUNNING],
+        ).first()
+        if existing:
+            return existing
+
+        # an inactive user's sessions stop authenticating straight away
+        User.objects.filter(pk=customer.pk).update(is_active=False, deleted_at=timezone.now())
+
+        return CustomerDeletionJob.objects.create(
+            user=customer,
+            user_email=customer.email,
+            user_full_name=customer.full_name,
+            requested_by=requested_by,
+        )
+
+
+def _claim_job():
+    """Claim the oldest unfinished job nobody else is working on."""
+    now = timezone.now()
+    cutoff = now - timedelta(
+        minutes=getattr(settings, 'CUSTOMER_DELETION_CLAIM_TIMEOUT_MINUTES', 10)
+    )
+    unclaimed = (
+        Q(status__in=[CustomerDeletionJob.STATUS_PENDING, CustomerDeletionJob.STATUS_RUNNING])
+        & (Q(claimed_at__isnull=True) | Q(claimed_at__lt=cutoff))
+    )
+
+    for pk in CustomerDeletionJob.objects.filter(unclaimed).order_by('created_at').values_list('pk', flat=True)[:5]:
+        claimed = CustomerDeletionJob.objects.filter(unclaimed, pk=pk).update(
+            status=CustomerDeletionJob.STATUS_RUNNING,
+            claimed_at=now,
+        )
+        if claimed:
+            return CustomerDeletionJob.objects.get(pk=pk)
+    return None
+
+
+@atomic_retry
+def _run_batch(job_id, step, queryset, null_field, batch_size):
+    ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+
+    count = 0
+    if ids:
+        rows = queryset.model.objects.filter(pk__in=ids)
+        if null_field:
+            count = rows.update(**{null_field: None})
+        else:
+            # dependents were removed by earlier steps, so the collector
+            # only finds this batch; count this model's rows
+            _, per_model = rows.delete()
+            count = per_model.get(queryset.model._meta.label, 0)
+
+    job = CustomerDeletionJob.objects.select_for_update().get(pk=job_id)
+    job.current_step = step
+    job.progress[step] = job.progress.get(step, 0) + count
+    job.deleted_rows += 0 if null_field else count
+    job.claimed_at = timezone.now()
+    job.save(update_fields=['current_step', 'progress', 'deleted_rows', 'claimed_at'])
+    return len(ids)
+
+
+@atomic_retry
+def _delete_user(job_id, user_id):
+    user = User.objects.filter(pk=user_id).first()
+    deleted = 0
+    if user is not None:
+        # only the portfolio and a few small tables are left to collect
+        deleted, _ = user.delete()
+
+    job = CustomerDeletionJob.objects.select_for_update().get(pk=job_id)
+    job.current_step = "user"
+    job.progress["user"] = deleted
+    job.deleted_rows += deleted
+    job.status = CustomerDeletionJob.STATUS_COMPLETED
+    job.claimed_at = None
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def _process_job(job, batch_size, deadline):
+    """Run ``job`` until it finishes or the deadline passes. True if finished."""
+    user = User.objects.filter(pk=job.user_id).select_related('portfolio').first()
+    portfolio_id = getattr(getattr(user, 'portfolio', None), 'pk', None)
+
+    if user is not None and portfolio_id is not None:
+        steps = _steps(user.pk, portfolio_id)
+        names = [name for name, _, _ in steps]
+        start = names.index(job.current_step) if job.current_step in names else 0
+
+        for name, queryset, null_field in steps[start:]:
+            while True:
+                if time.monotonic() >= deadline:
+                    return False
+                if _run_batch(job.pk, name, queryset, null_field, batch_size) < batch_size:
+                    break
+
+    _delete_user(job.pk, job.user_id)
+    return True
+
+
+def run_deletion_jobs(batch_size=None, time_budget=None):
+    """
+    Work on queued deletions for up to ``time_budget`` seconds. Returns
+    ``{"jobs": n, "completed": n, "failed": n}``.
+    """
+    batch_size = batch_size or getattr(settings, 'CUSTOMER_DELETION_BATCH_SIZE', 500)
+    if time_budget is None:
+        time_budget = getattr(settings, 'CUSTOMER_DELETION_TIME_BUDGET_SECONDS', 40)
+    deadline = time.monotonic() + time_budget
+    totals = {"jobs": 0, "completed": 0, "failed": 0}
+
+    while time.monotonic() < deadline:
+        job = _claim_job()
+        if job is None:
+            break
+        totals["jobs"] += 1
+
+        try:
+            finished = _process_job(job, batch_size, deadline)
+        except Exception:
+            logger.exception("Customer deletion job %s failed", job.pk)
+            CustomerDeletionJob.objects.filter(pk=job.pk).update(
+                status=CustomerDeletionJob.STATUS_FAILED,
+                last_error=traceback.format_exc(),
+                claimed_at=None,
+            )
+            totals["failed"] += 1
+            continue
+
+        if finished:
+            totals["completed"] += 1
+        else:
+            # out of time: let the next run pick it up straight away
+            CustomerDeletionJob.objects.filter(pk=job.pk).update(claimed_at=None)
+
+    return totals
+
+
+def retry_deletion_job(job_id):
+    """Put a failed job back in the queue; it resumes at its last step."""
+    return CustomerDeletionJob.objects.filter(
+        pk=job_id, status=CustomerDeletionJob.STATUS_FAILED,
+    ).update(status=CustomerDeletionJob.STATUS_PENDING, last_error='')
@@ -1,6 +1,7 @@
 from django import forms
 from django.utils import timezone
 
+from customer.models import Portfolio
 from transaction.models import Transaction
 from plan.models import OrderPlan
 
@@ -39,7 +40,9 @@ class StaffTransactionForm(forms.ModelForm):
         exclude = ("transaction_type", "balance")
 
         widgets = {
-            "portfolio": forms.Select(attrs={"class": "form-select"}),
+            # picked through the search box in transaction_form.html;
+            # rendering a Select would load every portfolio
+            "portfolio": forms.HiddenInput,
             "payment_method": forms.Select(attrs={"class": "form-select"}),
             "currency": forms.Select(attrs={"class": "form-select"}),
             "status": forms.Select(attrs={"class": "form-select"}),
@@ -69,7 +72,7 @@ class StaffTransactionForm(forms.ModelForm):
         )
 
         for field in self.fields.values():
-            if isinstance(field.widget, forms.RadioSelect):
+            if isinstance(field.widget, (forms.RadioSelect, forms.HiddenInput)):
                 continue
 
             css = field.widget.attrs.get("class", "")
@@ -77,6 +80,14 @@ class StaffTransactionForm(forms.ModelForm):
                 field.widget.attrs["class"] = "form-control"
 
 
+    def selected_portfolio(self):
+        """The currently chosen portfolio, for redisplaying the picker."""
+        value = self["portfolio"].value()
+        if not value or not str(value).isdigit():
+            return None
+        return Portfolio.objects.select_related("user").filter(pk=value).first()
+
+
 class OrderPlanUpdateForm(forms.ModelForm):
     start_at = forms.DateTimeField(
         initial=timezone.now,
@@ -109,4 +120,21 @@ class OrderPlanUpdateForm(forms.ModelForm):
                     "min": "0",
                 }
             ),
-        }
\ No newline at end of file
+        }
+
+class TransactionImportForm(forms.Form):
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(
+            attrs={
+                "class": "form-control",
+                "accept": ".csv,.jsonl,.ndjson",
+            }
+        ),
+        help_text="CSV with a header row, or JSON Lines (one object per line).",
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data["file"]
+        if not upload.name.lower().endswith((".csv", ".jsonl", ".ndjson")):
+            raise forms.ValidationError("Upload a .csv or .jsonl file.")
+        return upload
@@ -0,0 +1,36 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from staff.analytics import refresh_rollups, backfill_flow_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily flow and AUM rollups behind the staff analytics page."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Recent days to recompute (default ANALYTICS_REFRESH_DAYS).",
+        )
+        parser.add_argument(
+            "--since",
+            help="Also rebuild flow rollups for every day from this date (YYYY-MM-DD).",
+        )
+
+    def handle(self, *args, **options):
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be a date, e.g. 2024-01-31")
+            rows = backfill_flow_rollups(since)
+            self.stdout.write(f"Backfilled {rows} flow rollup rows since {since}")
+
+        result = refresh_rollups(days=options["days"])
+        self.stdout.write(
+            f"Refreshed {result['flow_days']} days ({result['flow_rows']} flow rows), "
+            f"{result['aum_rows']} AUM rows"
+        )
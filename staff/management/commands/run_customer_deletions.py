@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from staff.deletion import run_deletion_jobs
+
+
+class Command(BaseCommand):
+    help = "Work through queued customer deletion jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            default=None,
+            help="Seconds to keep working (default CUSTOMER_DELETION_TIME_BUDGET_SECONDS).",
+        )
+
+    def handle(self, *args, **options):
+        result = run_deletion_jobs(
+            batch_size=options["batch_size"],
+            time_budget=options["time_budget"],
+        )
+        self.stdout.write(
+            f"Worked on {result['jobs']} jobs: {result['completed']} completed, "
+            f"{result['failed']} failed"
+        )
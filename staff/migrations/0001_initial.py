@@ -0,0 +1,51 @@
+# Generated by Django 4.2 on 2026-10-19 12:35
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAUMRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('plantype', models.CharField(max_length=30)),
+                ('aum', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20)),
+                ('active_orders', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyFlowRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('transaction_type', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('currency', models.CharField(blank=True, default='', max_length=3)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='dailyflowrollup',
+            index=models.Index(fields=['status', 'date'], name='flow_rollup_status_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyflowrollup',
+            unique_together={('date', 'transaction_type', 'status', 'currency')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyaumrollup',
+            unique_together={('date', 'plantype')},
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-19 12:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('staff', '0002_customerdeletionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor_email', models.EmailField(blank=True, max_length=254)),
+                ('action', models.CharField(choices=[('customer.edit', 'Customer edited'), ('customer.delete', 'Customer deletion requested'), ('user.otp_toggle', 'OTP login toggled'), ('user.email_verification_toggle', 'Email verification toggled'), ('snapshot.positive', 'Positive snapshot'), ('snapshot.negative', 'Negative snapshot'), ('order_plan.update', 'Order plan yield edited'), ('deposit.approve', 'Deposit approved'), ('deposit.decline', 'Deposit declined'), ('withdrawal.approve', 'Withdrawal approved'), ('withdrawal.decline', 'Withdrawal declined'), ('transaction.create', 'Staff transaction posted'), ('transaction.import', 'Transactions imported'), ('vip.approve', 'VIP request approved'), ('vip.reject', 'VIP request rejected'), ('kyc.approve', 'KYC approved'), ('kyc.reject', 'KYC rejected')], max_length=50)),
+                ('target_type', models.CharField(blank=True, max_length=100)),
+                ('target_id', models.CharField(blank=True, max_length=64)),
+                ('target_repr', models.CharField(blank=True, max_length=255)),
+                ('changes', models.JSONField(blank=True, default=dict)),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('path', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-created_at', '-id'], name='audit_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['action', '-created_at'], name='audit_action_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['actor', '-created_at'], name='audit_actor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['target_type', 'target_id', '-created_at'], name='audit_target_idx'),
+        ),
+    ]
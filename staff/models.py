@@ -1,3 +1,173 @@
+from decimal import Decimal
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+class DailyFlowRollup(models.Model):
+    """
+    Transactions per day (by timestamp), type, status and currency.
+    Maintained by ``staff.analytics.refresh_rollups``.
+    """
+    date = models.DateField()
+    transaction_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    # '' for transactions without a currency
+    currency = models.CharField(max_length=3, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('date', 'transaction_type', 'status', 'currency')
+        indexes = [
+            models.Index(fields=['status', 'date'], name='flow_rollup_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.transaction_type} {self.status} {self.currency}: {self.total}"
+
+
+class DailyAUMRollup(models.Model):
+    """
+    End-of-day (or latest, for today) value of open orders per plan type.
+    Maintained by ``staff.analytics.refresh_rollups``.
+    """
+    date = models.DateField()
+    plantype = models.CharField(max_length=30)
+    aum = models.DecimalField(max_digits=20, decimal_places=2, default=Decimal('0.00'))
+    active_orders = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('date', 'plantype')
+
+    def __str__(self):
+        return f"{self.date} {self.plantype}: {self.aum}"
+
+
+class DirtyFlowDay(models.Model):
+    """
+    A day older than the refresh window whose flow rollup is out of date
+    because a transaction was written with a backdated timestamp. Marked
+    by ``staff.analytics.mark_flow_days_dirty``, cleared when
+    ``refresh_rollups`` recomputes the day.
+    """
+    date = models.DateField(unique=True)
+    marked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.date} (dirty)"
+
+
+class CustomerDeletionJob(models.Model):
+    """
+    Background deletion of a customer and everything under them, run by
+    ``staff.deletion.run_deletion_jobs``. The user is deactivated and
+    tombstoned (``User.deleted_at``) as soon as the job is created.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # null once the user row itself is gone
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='deletion_jobs'
+    )
+    user_email = models.EmailField()
+    user_full_name = models.CharField(max_length=255, blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    current_step = models.CharField(max_length=50, blank=True)
+    # rows deleted so far, per step
+    progress = models.JSONField(default=dict, blank=True)
+    deleted_rows = models.PositiveBigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='deletion_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Delete {self.user_email} ({self.status})"
+
+
+class AuditLog(models.Model):
+    """
+    One staff action. Written by ``staff.audit.record`` (or
+    ``record_many``) right after the action.
+    """
+    ACTION_CHOICES = [
+        ('customer.edit', 'Customer edited'),
+        ('customer.delete', 'Customer deletion requested'),
+        ('user.otp_toggle', 'OTP login toggled'),
+        ('user.email_verification_toggle', 'Email verification toggled'),
+        ('snapshot.positive', 'Positive snapshot'),
+        ('snapshot.negative', 'Negative snapshot'),
+        ('order_plan.update', 'Order plan yield edited'),
+        ('deposit.approve', 'Deposit approved'),
+        ('deposit.decline', 'Deposit declined'),
+        ('withdrawal.approve', 'Withdrawal approved'),
+        ('withdrawal.decline', 'Withdrawal declined'),
+        ('transaction.create', 'Staff transaction posted'),
+        ('transaction.import', 'Transactions imported'),
+        ('vip.approve', 'VIP request approved'),
+        ('vip.reject', 'VIP request rejected'),
+        ('kyc.approve', 'KYC approved'),
+        ('kyc.reject', 'KYC rejected'),
+    ]
+
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+'
+    )
+    # kept so entries stay readable after the actor is deleted
+    actor_email = models.EmailField(blank=True)
+    action = models.CharField(max_length=50, choices=ACTION_CHOICES)
+    target_type = models.CharField(max_length=100, blank=True)
+    target_id = models.CharField(max_length=64, blank=True)
+    target_repr = models.CharField(max_length=255, blank=True)
+    # {"field": [before, after]}
+    changes = models.JSONField(default=dict, blank=True)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    path = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='audit_created_idx'),
+            models.Index(fields=['action', '-created_at'], name='audit_action_idx'),
+            models.Index(fields=['actor', '-created_at'], name='audit_actor_idx'),
+            models.Index(fields=['target_type', 'target_id', '-created_at'], name='audit_target_idx'),
+        ]
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.actor_email} {self.action} {self.target_repr}"
@@ -1,48 +1,243 @@
 # app/services.py
 from decimal import Decimal, ROUND_HALF_EVEN
-from django.db import transaction
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db.models import Sum
+
+from base.db import atomic_retry
+from customer.models import Portfolio
 from plan.models import OrderPlan, OrderPlanItem, TransactionLog
+from transaction.models import Transaction
+from .analytics import mark_flow_days_dirty
+
 
+@atomic_retry
 def create_manual_snapshot(order_id, percent, actor=None, reason=None):
     """
     Create a new OrderPlanItem with given percent (positive or negative).
     """
     snapshot_date = timezone.now()
-    
 
-    with transaction.atomic():
-        order = OrderPlan.objects.select_for_update().get(pk=order_id)
-        before_value = order.current_value
+    order = OrderPlan.objects.select_for_update().get(pk=order_id)
+    before_value = order.current_value
 
-        delta = (order.principal_amount * (percent / Decimal('100'))).quantize(
-            Decimal('0.01'), rounding=ROUND_HALF_EVEN
-        )
+    delta = (order.principal_amount * (percent / Decimal('100'))).quantize(
+        Decimal('0.01'), rounding=ROUND_HALF_EVEN
+    )
 
-        item = OrderPlanItem.objects.create(
-            order_plan=order,
-            snapshot_at=snapshot_date,
-            delta_amount=delta,
-            percent_applied=percent,
-        )
+    item = OrderPlanItem.objects.create(
+        order_plan=order,
+        snapshot_at=snapshot_date,
+        delta_amount=delta,
+        percent_applied=percent,
+    )
 
-        # recompute cumulative
-        total_delta = order.items.aggregate(total=Sum('delta_amount'))['total'] or Decimal('0.00')
-        cumulative = (order.principal_amount + total_delta).quantize(Decimal('0.01'), rounding=ROUND_HALF_EVEN)
-        item.cumulative_amount = cumulative
-        item.save(update_fields=['cumulative_amount'])
-
-        order.current_value = cumulative
-        order.save(update_fields=['current_value'])
-
-        TransactionLog.objects.create(
-            order_plan=order,
-            before_value=before_value,
-            change_amount=delta,
-            after_value=order.current_value,
-            reason=reason or f"Manual snapshot ({percent}%)",
-            created_by=actor
-        )
+    # recompute cumulative
+    total_delta = order.items.aggregate(total=Sum('delta_amount'))['total'] or Decimal('0.00')
+    cumulative = (order.principal_amount + total_delta).quantize(Decimal('0.01'), rounding=ROUND_HALF_EVEN)
+    item.cumulative_amount = cumulative
+    item.save(update_fields=['cumulative_amount'])
+
+    order.current_value = cumulative
+    order.save(update_fields=['current_value'])
+
+    TransactionLog.objects.create(
+        order_plan=order,
+        before_value=before_value,
+        change_amount=delta,
+        after_value=order.current_value,
+        reason=reason or f"Manual snapshot ({percent}%)",
+        created_by=actor
+    )
 
     return item
+
+
+def _lock_pending(transaction_id, transaction_type):
+    """
+    Lock a pending transaction and its portfolio.
+    Returns None if it has already been processed.
+    """
+    trx = (
+        Transaction.objects
+        .select_for_update()
+        .filter(id=transaction_id, transaction_type=transaction_type, status='PENDING')
+        .first()
+    )
+    if trx is not None:
+        trx.portfolio = Portfolio.objects.select_for_update().get(pk=trx.portfolio_id)
+    return trx
+
+
+@atomic_retry
+def approve_deposit(transaction_id):
+    deposit = _lock_pending(transaction_id, 'DEPOSIT')
+    if deposit is None:
+        return None
+
+    portfolio = deposit.portfolio
+    portfolio.cash_balance += deposit.amount
+    portfolio.save(update_fields=['cash_balance'])
+
+    deposit.status = 'SUCCESSFUL'
+    deposit.balance = portfolio.cash_balance
+    deposit.save(update_fields=['status', 'balance'])
+    return deposit
+
+
+@atomic_retry
+def decline_deposit(transaction_id):
+    deposit = _lock_pending(transaction_id, 'DEPOSIT')
+    if deposit is None:
+        return None
+
+    deposit.status = 'FAILED'
+    deposit.save(update_fields=['status'])
+    return deposit
+
+
+@atomic_retry
+def approve_withdrawal(transaction_id):
+    withdraw = _lock_pending(transaction_id, 'WITHDRAW')
+    if withdraw is None:
+        return None
+
+    # Funds already deducted at request time
+    withdraw.status = 'SUCCESSFUL'
+    withdraw.save(update_fields=['status'])
+    return withdraw
+
+
+@atomic_retry
+def decline_withdrawal(transaction_id):
+    withdraw = _lock_pending(transaction_id, 'WITHDRAW')
+    if withdraw is None:
+        return None
+
+    # Refund the reserved funds
+    portfolio = withdraw.portfolio
+    portfolio.cash_balance += withdraw.amount
+    portfolio.save(update_fields=['cash_balance'])
+
+    withdraw.status = 'FAILED'
+    withdraw.balance = portfolio.cash_balance
+    withdraw.save(update_fields=['status', 'balance'])
+    return withdraw
+
+
+def balance_change(transaction_type, status, amount):
+    """
+    What a DEPOSIT/WITHDRAW in ``status`` does to the cash balance when it
+    is written, matching the review flow: a deposit is credited when it
+    succeeds (approve_deposit credits a pending one), a withdrawal is
+    reserved as soon as it is pending (decline_withdrawal refunds it).
+    """
+    if transaction_type == "DEPOSIT" and status == "SUCCESSFUL":
+        return amount
+    if transaction_type == "WITHDRAW" and status in ("PENDING", "SUCCESSFUL"):
+        return -amount
+    return Decimal('0.00')
+
+
+@atomic_retry
+def post_staff_transaction(trx):
+    """
+    Save a staff-created DEPOSIT/WITHDRAW and apply it to the portfolio
+    balance as ``balance_change`` says for its status. Raises
+    ValidationError on insufficient balance.
+    """
+    portfolio = Portfolio.objects.select_for_update().get(pk=trx.portfolio_id)
+
+    change = balance_change(trx.transaction_type, trx.status, trx.amount)
+    if portfolio.cash_balance + change < 0:
+        raise ValidationError("Insufficient customer balance.")
+    if change:
+        portfolio.cash_balance += change
+        portfolio.save(update_fields=['cash_balance'])
+
+    # a retried attempt must insert afresh
+    trx.pk = None
+    trx.portfolio = portfolio
+    trx.balance = portfolio.cash_balance
+    trx.save()
+    # the form allows backdating past the days refresh_rollups recomputes
+    mark_flow_days_dirty([trx.timestamp])
+    return trx
+
+
+BULK_REVIEW_LIMIT = 500
+
+
+@atomic_retry
+def bulk_review_transactions(transaction_type, transaction_ids, action):
+    """
+    Approve or decline many pending DEPOSIT/WITHDRAW transactions in one
+    pass. Balance changes are summed per portfolio and written with a
+    single bulk update.
+
+    Returns one report row per requested id:
+    {"id", "customer", "amount", "result", "detail"}
+    where result is "approved", "declined" or "skipped".
+    """
+    approve = action == "approve"
+    pending = list(
+        Transaction.objects
+        .select_for_update()
+        .filter(
+            id__in=transaction_ids,
+            transaction_type=transaction_type,
+            status='PENDING',
+        )
+        .order_by('timestamp', 'id')
+    )
+
+    portfolio_ids = {trx.portfolio_id for trx in pending}
+    portfolios = Portfolio.objects.select_for_update().in_bulk(portfolio_ids)
+    customers = dict(
+        Portfolio.objects
+        .filter(pk__in=portfolio_ids)
+        .values_list('pk', 'user__email')
+    )
+
+    # Deposits credit on approval, withdrawals were reserved up front and
+    # are refunded on decline. The other two cases only change status.
+    moves_money = (transaction_type == 'DEPOSIT') == approve
+    changed_portfolios = {}
+
+    for trx in pending:
+        trx.status = 'SUCCESSFUL' if approve else 'FAILED'
+        if moves_money:
+            portfolio = portfolios[trx.portfolio_id]
+            portfolio.cash_balance += trx.amount
+            trx.balance = portfolio.cash_balance
+            changed_portfolios[portfolio.pk] = portfolio
+
+    Transaction.objects.bulk_update(pending, ['status', 'balance'])
+    Portfolio.objects.bulk_update(changed_portfolios.values(), ['cash_balance'])
+
+    processed = {trx.id: trx for trx in pending}
+    report = []
+    for transaction_id in transaction_ids:
+        trx = processed.get(transaction_id)
+        if trx is None:
+            report.append({
+                "id": transaction_id,
+                "customer": "",
+                "amount": "",
+                "result": "skipped",
+                "detail": "Not found or already processed.",
+            })
+            continue
+
+        detail = ""
+        if moves_money:
+            detail = f"New balance {trx.balance}"
+        report.append({
+            "id": trx.id,
+            "customer": customers.get(trx.portfolio_id, ""),
+            "amount": str(trx.amount),
+            "result": "approved" if approve else "declined",
+            "detail": detail,
+        })
+
+    return report
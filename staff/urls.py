@@ -8,10 +8,20 @@ urlpatterns = [
     path('dashboard/', views.admin_dashboard_view, name='admin_dashboard'),
     path('customer/<int:user_id>/detail/',views.admin_customer_detail_view,
     name='admin_customer_detail'),
+    path('customer/<int:user_id>/orders.json', views.admin_customer_orders_json,
+    name='admin_customer_orders_json'),
+    path('customer/<int:user_id>/transactions.json', views.admin_customer_transactions_json,
+    name='admin_customer_transactions_json'),
+    path('customer/<int:user_id>/copy-relationships.json', views.admin_customer_copy_json,
+    name='admin_customer_copy_json'),
+    path('customer/<int:user_id>/kyc.json', views.admin_customer_kyc_json,
+    name='admin_customer_kyc_json'),
     path("customer/<int:user_id>/edit/", views.admin_edit_customer_view,
     name="admin_edit_customer"),
     path("customers/<int:user_id>/delete/", views.admin_delete_customer_view,
     name="admin_delete_customer"),
+    path("customers/deletions/", views.customer_deletions_view,
+    name="admin_customer_deletions"),
 
     path('plans/', views.admin_plan_list_view,name='admin_plan_list'),
     path('plan/create/', views.admin_plan_create_view,name='admin_plan_create'),
@@ -59,6 +69,24 @@ urlpatterns = [
         views.transaction_create_view,
         name='admin_transaction_create'
     ),
+    path(
+        'portfolio-search/',
+        views.portfolio_search_view,
+        name='admin_portfolio_search'
+    ),
+    path(
+        'transaction/import/',
+        views.transaction_import_view,
+        name='admin_transaction_import'
+    ),
+    path(
+        'transaction/import/<int:pk>/errors/',
+        views.transaction_import_errors_view,
+        name='admin_transaction_import_errors'
+    ),
+    path('email-outbox/', views.email_outbox_view, name='admin_email_outbox'),
+    path('analytics/', views.analytics_view, name='admin_analytics'),
+    path('audit-log/', views.audit_log_view, name='admin_audit_log'),
     path(
         "order-plan/<int:pk>/edit/",
         views.order_plan_update_view,
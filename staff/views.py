@@ -1,69 +1,300 @@
 import traceback
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
 from django.utils import timezone
 from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q, Count, Sum, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.urls import reverse
 from decimal import Decimal
-
-from .services import create_manual_snapshot
+from datetime import datetime, time, timedelta
+from django.utils.dateparse import parse_date
+
+from .services import (
+    create_manual_snapshot, approve_deposit, decline_deposit,
+    approve_withdrawal, decline_withdrawal, post_staff_transaction,
+    bulk_review_transactions, BULK_REVIEW_LIMIT,
+)
 from .decorators import admin_staff_only
+from .analytics import analytics_summary
+from .deletion import schedule_customer_deletion, retry_deletion_job
+from .models import CustomerDeletionJob, AuditLog
+from . import audit
+from base.pagination import keyset_page, InvalidCursor
 from account.models import User, KYC, VIPRequest
+from customer.models import Portfolio
 from account.forms import AdminCustomerEditForm
 from account.utils import approve_vip_request, reject_vip_request
 from plan.models import Plan, OrderPlan
 from plan.forms import PlanForm
-from transaction.models import Transaction, Coin, Wallet
+from transaction.models import Transaction, TransactionImport, Coin, Wallet
+from copytrade.models import CopyRelationship
+from transaction.importers import import_transactions
 from transaction.forms import CoinForm, WalletForm
-from notification.email_utils import send_html_email
-from .forms import StaffTransactionForm, OrderPlanUpdateForm
+from notification.models import EmailOutbox
+from notification.outbox import queue_html_email, requeue_dead, circuit_is_open
+from .forms import StaffTransactionForm, OrderPlanUpdateForm, TransactionImportForm
+
+
+CUSTOMER_PAGE_SIZE = 25
+
+# sort key -> keyset ordering; each ends with a unique field so the order is total
+CUSTOMER_SORTS = {
+    "joined": ("-date_joined", "-pk"),
+    "joined_asc": ("date_joined", "pk"),
+    "balance": ("-portfolio__cash_balance", "-portfolio__pk"),
+    "balance_asc": ("portfolio__cash_balance", "portfolio__pk"),
+}
 
 
 @login_required
 @admin_staff_only
 def admin_dashboard_view(request):
-    customers = User.objects.filter(is_staff=False).order_by('-date_joined')
+    term = request.GET.get("q", "").strip()
+    sort = request.GET.get("sort", "joined")
+    if sort not in CUSTOMER_SORTS:
+        sort = "joined"
+
+    customers = (
+        User.objects
+        .filter(is_staff=False, deleted_at__isnull=True)
+        .select_related("portfolio")
+    )
+    if sort.startswith("balance"):
+        # customers without a portfolio have no balance to sort or seek on
+        customers = customers.filter(portfolio__isnull=False)
+    if term:
+        customers = customers.filter(
+            Q(email__istartswith=term) |
+            Q(full_name__istartswith=term) |
+            Q(country__istartswith=term)
+        )
+
+    try:
+        page = keyset_page(
+            customers,
+            CUSTOMER_SORTS[sort],
+            cursor=request.GET.get("cursor"),
+            page_size=CUSTOMER_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        page = keyset_page(customers, CUSTOMER_SORTS[sort], page_size=CUSTOMER_PAGE_SIZE)
 
     context = {
         "current_url": request.resolver_match.url_name,
-        "customers": customers,
+        "customers": page,
+        "q": term,
+        "sort": sort,
     }
 
     return render(request, 'staff/dashboard.html', context)
 
 
+def _per_portfolio(queryset, fk, aggregate, default=0):
+    """Correlated subquery: ``aggregate`` over the customer's rows of ``queryset``."""
+    rows = (
+        queryset
+        .filter(**{fk: OuterRef('portfolio')})
+        .order_by()
+        .values(fk)
+        .annotate(value=aggregate)
+        .values('value')
+    )
+    return Coalesce(Subquery(rows), Value(default))
+
+
 @login_required
 @admin_staff_only
 def admin_customer_detail_view(request, user_id):
-    customer = get_object_or_404(User, id=user_id, is_staff=False)
-    order_plan = OrderPlan.objects.filter(portfolio=customer.portfolio)
-    order_plan_count = order_plan.count()
-
-    transactions = Transaction.objects.filter(
-        portfolio=customer.portfolio
-    ).order_by("-timestamp")
+    # one query for the header; the tabs load from the JSON views below
+    open_orders = OrderPlan.objects.filter(
+        status__in=[OrderPlan.STATUS_ACTIVE, OrderPlan.STATUS_PAUSED]
+    )
+    customer = get_object_or_404(
+        User.objects
+        .select_related('portfolio')
+        .annotate(
+            order_plan_count=_per_portfolio(
+                OrderPlan.objects.filter(status=OrderPlan.STATUS_ACTIVE), 'portfolio', Count('id'),
+            ),
+            open_order_value=_per_portfolio(
+                open_orders, 'portfolio', Sum('current_value'), Decimal('0.00'),
+            ),
+            transaction_count=_per_portfolio(Transaction.objects.all(), 'portfolio', Count('id')),
+            pending_transaction_count=_per_portfolio(
+                Transaction.objects.filter(status='PENDING'), 'portfolio', Count('id'),
+            ),
+            following_count=_per_portfolio(CopyRelationship.objects.all(), 'follower', Count('id')),
+            follower_count=_per_portfolio(CopyRelationship.objects.all(), 'leader', Count('id')),
+        ),
+        id=user_id,
+        is_staff=False,
+    )
 
     context = {
         "current_url": request.resolver_match.url_name,
         "customer": customer,
-        "order_plan":order_plan,
-        "order_plan_count":order_plan_count,
-        "transactions": transactions,
     }
 
     return render(request, 'staff/customer_detail.html', context)
 
 
+CUSTOMER_TAB_PAGE_SIZE = 20
+
+
+def _customer_tab_json(request, queryset, ordering, serialize):
+    """
+    One keyset page of ``queryset`` (already limited to the customer) as
+    ``{"results": [...], "next": cursor}``.
+    """
+    try:
+        page = keyset_page(
+            queryset,
+            ordering,
+            cursor=request.GET.get("cursor"),
+            page_size=CUSTOMER_TAB_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        return JsonResponse({"error": "Invalid cursor."}, status=400)
+
+    return JsonResponse({
+        "results": [serialize(obj) for obj in page],
+        "next": page.next_cursor,
+    })
+
+
+def _customer_portfolio(user_id):
+    return get_object_or_404(Portfolio, user_id=user_id, user__is_staff=False)
+
+
+@login_required
+@admin_staff_only
+def admin_customer_orders_json(request, user_id):
+    portfolio = _customer_portfolio(user_id)
+
+    def serialize(order):
+        return {
+            "id": order.id,
+            "plan": order.plan.name,
+            "status": order.get_status_display(),
+            "yield_percent": str(order.yield_percent),
+            "principal_amount": str(order.principal_amount),
+            "current_value": str(order.current_value),
+            "is_mirrowed": order.is_mirrowed,
+            "created_at": order.created_at.isoformat(),
+            "spin_up_url": reverse('staff:snapshot_positive', args=[order.id]),
+            "spin_down_url": reverse('staff:snapshot_negative', args=[order.id]),
+            "edit_url": reverse('staff:admin_order_plan_update', args=[order.id]),
+        }
+
+    return _customer_tab_json(
+        request,
+        OrderPlan.objects.filter(portfolio=portfolio).select_related('plan'),
+        ("-created_at", "-pk"),
+        serialize,
+    )
+
+
+@login_required
+@admin_staff_only
+def admin_customer_transactions_json(request, user_id):
+    portfolio = _customer_portfolio(user_id)
+
+    def serialize(t):
+        return {
+            "id": t.id,
+            "type": t.get_transaction_type_display(),
+            "amount": str(t.amount),
+            "currency": t.currency or "USD",
+            "payment_method": t.get_payment_method_display() or "",
+            "status": t.status,
+            "balance": str(t.balance),
+            "timestamp": t.timestamp.isoformat(),
+        }
+
+    return _customer_tab_json(
+        request,
+        Transaction.objects.filter(portfolio=portfolio),
+        ("-timestamp", "-pk"),
+        serialize,
+    )
+
+
+@login_required
+@admin_staff_only
+def admin_customer_copy_json(request, user_id):
+    portfolio = _customer_portfolio(user_id)
+
+    def serialize(relationship):
+        following = relationship.follower_id == portfolio.id
+        other = relationship.leader if following else relationship.follower
+        return {
+            "id": relationship.id,
+            "direction": "following" if following else "follower",
+            "email": other.user.email,
+            "full_name": other.user.full_name,
+            "allocated_cash": str(relationship.allocated_cash),
+            "remaining_cash": str(relationship.remaining_cash),
+            "trade_percentage": str(relationship.trade_percentage),
+            "is_active": relationship.is_active,
+            "created_at": relationship.created_at.isoformat(),
+            "detail_url": reverse('staff:admin_customer_detail', args=[other.user_id]),
+        }
+
+    return _customer_tab_json(
+        request,
+        CopyRelationship.objects
+        .filter(Q(follower=portfolio) | Q(leader=portfolio))
+        .select_related('follower__user', 'leader__user'),
+        ("-created_at", "-pk"),
+        serialize,
+    )
+
+
+@login_required
+@admin_staff_only
+def admin_customer_kyc_json(request, user_id):
+    # a customer has at most one KYC record, so there is nothing to page
+    kyc = KYC.objects.filter(
+        portfolio__user_id=user_id, portfolio__user__is_staff=False,
+    ).first()
+
+    if kyc is None:
+        return JsonResponse({"kyc": None})
+
+    return JsonResponse({"kyc": {
+        "id": kyc.id,
+        "status": kyc.status,
+        "status_display": kyc.get_status_display(),
+        "document_type": kyc.get_document_type_display() or "",
+        "document_number": kyc.document_number or "",
+        "country": kyc.country or "",
+        "submitted_at": kyc.submitted_at.isoformat() if kyc.submitted_at else None,
+        "reviewed_at": kyc.reviewed_at.isoformat() if kyc.reviewed_at else None,
+        "rejection_reason": kyc.rejection_reason or "",
+        "review_url": reverse('staff:admin_kyc_review', args=[kyc.id]),
+    }})
+
+
 @login_required
 @admin_staff_only
 def admin_edit_customer_view(request, user_id):
     customer = get_object_or_404(User, id=user_id, is_staff=False)
 
     if request.method == "POST":
+        before = audit.snapshot(customer, AdminCustomerEditForm.Meta.fields)
         form = AdminCustomerEditForm(request.POST, instance=customer)
         if form.is_valid():
             form.save()
+            audit.record(
+                request, "customer.edit", customer,
+                audit.diff(before, audit.snapshot(customer, AdminCustomerEditForm.Meta.fields)),
+                target_repr=customer.email,
+            )
             alert_msg = f"{customer.full_name}'s information is updated successfuly."
             messages.success(request,  alert_msg)
             return redirect("staff:admin_dashboard")
@@ -82,16 +313,17 @@ def admin_edit_customer_view(request, user_id):
 @login_required
 @admin_staff_only
 def admin_delete_customer_view(request, user_id):
-    customer = get_object_or_404(User, id=user_id, is_staff=False)
+    customer = get_object_or_404(User, id=user_id, is_staff=False, deleted_at__isnull=True)
 
     if request.method == "POST":
-        full_name = customer.full_name
-        customer.delete()
+        job = schedule_customer_deletion(customer, requested_by=request.user)
+        audit.record(request, "customer.delete", customer, {"job": [None, job.pk]},
+                     target_repr=customer.email)
         messages.success(
             request,
-            f"{full_name} has been deleted successfully."
+            f"{customer.full_name} has been deactivated and their data is being deleted."
         )
-        return redirect("staff:admin_dashboard")
+        return redirect("staff:admin_customer_deletions")
 
     context = {
         "current_url": request.resolver_match.url_name,
@@ -191,9 +423,48 @@ def admin_plan_delete_view(request, pk):
     )
 
 
+def _bulk_review(request, transaction_type):
+    """
+    Handle the multi-select form on the pending deposit/withdrawal pages.
+    The per-item report is kept in the session for the redirected GET.
+    """
+    action = request.POST.get("bulk_action")
+    transaction_ids = []
+    for value in request.POST.getlist("transaction_ids"):
+        if value.isdigit() and int(value) not in transaction_ids:
+            transaction_ids.append(int(value))
+
+    if action not in ("approve", "decline") or not transaction_ids:
+        messages.error(request, "Select at least one request and an action.")
+        return
+
+    if len(transaction_ids) > BULK_REVIEW_LIMIT:
+        messages.warning(
+            request,
+            f"Only the first {BULK_REVIEW_LIMIT} selected requests were processed."
+        )
+        transaction_ids = transaction_ids[:BULK_REVIEW_LIMIT]
+
+    report = bulk_review_transactions(transaction_type, transaction_ids, action)
+    done = sum(1 for row in report if row["result"] != "skipped")
+
+    audit_action = f"{'deposit' if transaction_type == 'DEPOSIT' else 'withdrawal'}.{action}"
+    audit.record_many([
+        audit.entry(
+            request, audit_action, Transaction(pk=row["id"]),
+            {"status": ["PENDING", "SUCCESSFUL" if action == "approve" else "FAILED"]},
+            target_repr=f"{row['amount']} for {row['customer']}",
+        )
+        for row in report
+        if row["result"] != "skipped"
+    ])
+
+    messages.success(request, f"{done} of {len(report)} selected requests {action}d.")
+    request.session["bulk_review_report"] = report
+
+
 @login_required
 @admin_staff_only
-@transaction.atomic
 def admin_deposit_requests_view(request):
     deposits = (
         Transaction.objects
@@ -203,39 +474,43 @@ def admin_deposit_requests_view(request):
     )
 
     if request.method == "POST":
+        if "bulk_action" in request.POST:
+            _bulk_review(request, 'DEPOSIT')
+            return redirect('staff:admin_deposit_requests')
+
         transaction_id = request.POST.get("transaction_id")
         action = request.POST.get("action")
 
         deposit = get_object_or_404(
-            Transaction,
+            Transaction.objects.select_related('portfolio__user'),
             id=transaction_id,
             transaction_type='DEPOSIT',
             status='PENDING'
         )
 
-        portfolio = deposit.portfolio
-
         if action == "approve":
-            portfolio.cash_balance += deposit.amount
-            portfolio.save(update_fields=['cash_balance'])
-
-            deposit.status = 'SUCCESSFUL'
-            deposit.balance = portfolio.cash_balance
-            deposit.save(update_fields=['status', 'balance'])
-
-            messages.success(
-                request,
-                f"Deposit of {deposit.amount} approved successfully."
-            )
+            if approve_deposit(deposit.id):
+                audit.record(request, "deposit.approve", deposit,
+                             {"status": ["PENDING", "SUCCESSFUL"]},
+                             target_repr=f"{deposit.amount} for {deposit.portfolio.user.email}")
+                messages.success(
+                    request,
+                    f"Deposit of {deposit.amount} approved successfully."
+                )
+            else:
+                messages.error(request, "This deposit has already been processed.")
 
         elif action == "decline":
-            deposit.status = 'FAILED'
-            deposit.save(update_fields=['status'])
-
-            messages.error(
-                request,
-                f"Deposit of {deposit.amount} was declined."
-            )
+            if decline_deposit(deposit.id):
+                audit.record(request, "deposit.decline", deposit,
+                             {"status": ["PENDING", "FAILED"]},
+                             target_repr=f"{deposit.amount} for {deposit.portfolio.user.email}")
+                messages.error(
+                    request,
+                    f"Deposit of {deposit.amount} was declined."
+                )
+            else:
+                messages.error(request, "This deposit has already been processed.")
 
         return redirect('staff:admin_deposit_requests')
 
@@ -244,6 +519,7 @@ def admin_deposit_requests_view(request):
         "staff/deposit_requests.html",
         {
             "deposits": deposits,
+            "bulk_report": request.session.pop("bulk_review_report", None),
             "current_url": request.resolver_match.url_name,
         }
     )
@@ -251,7 +527,6 @@ def admin_deposit_requests_view(request):
 
 @login_required
 @admin_staff_only
-@transaction.atomic
 def admin_withdraw_requests_view(request):
     withdrawals = (
         Transaction.objects
@@ -261,41 +536,43 @@ def admin_withdraw_requests_view(request):
     )
 
     if request.method == "POST":
+        if "bulk_action" in request.POST:
+            _bulk_review(request, 'WITHDRAW')
+            return redirect('staff:admin_withdraw_requests')
+
         transaction_id = request.POST.get("transaction_id")
         action = request.POST.get("action")
 
         withdraw = get_object_or_404(
-            Transaction,
+            Transaction.objects.select_related('portfolio__user'),
             id=transaction_id,
             transaction_type='WITHDRAW',
             status='PENDING'
         )
 
-        portfolio = withdraw.portfolio
-
         if action == "approve":
-            # Funds already deducted at request time
-            withdraw.status = 'SUCCESSFUL'
-            withdraw.save(update_fields=['status'])
-
-            messages.success(
-                request,
-                f"Withdrawal of {withdraw.amount} approved successfully."
-            )
+            if approve_withdrawal(withdraw.id):
+                audit.record(request, "withdrawal.approve", withdraw,
+                             {"status": ["PENDING", "SUCCESSFUL"]},
+                             target_repr=f"{withdraw.amount} for {withdraw.portfolio.user.email}")
+                messages.success(
+                    request,
+                    f"Withdrawal of {withdraw.amount} approved successfully."
+                )
+            else:
+                messages.error(request, "This withdrawal has already been processed.")
 
         elif action == "decline":
-            # Refund the reserved funds
-            portfolio.cash_balance += withdraw.amount
-            portfolio.save(update_fields=['cash_balance'])
-
-            withdraw.status = 'FAILED'
-            withdraw.balance = portfolio.cash_balance
-            withdraw.save(update_fields=['status', 'balance'])
-
-            messages.warning(
-                request,
-                f"Withdrawal of {withdraw.amount} was successfully declined and funds were returned to owner's poprtfolio balance."
-            )
+            if decline_withdrawal(withdraw.id):
+                audit.record(request, "withdrawal.decline", withdraw,
+                             {"status": ["PENDING", "FAILED"]},
+                             target_repr=f"{withdraw.amount} for {withdraw.portfolio.user.email}")
+                messages.warning(
+                    request,
+                    f"Withdrawal of {withdraw.amount} was successfully declined and funds were returned to owner's poprtfolio balance."
+                )
+            else:
+                messages.error(request, "This withdrawal has already been processed.")
 
         return redirect('staff:admin_withdraw_requests')
 
@@ -304,6 +581,7 @@ def admin_withdraw_requests_view(request):
         "staff/withdraw_requests.html",
         {
             "withdrawals": withdrawals,
+            "bulk_report": request.session.pop("bulk_review_report", None),
             "current_url": request.resolver_match.url_name,
         }
     )
@@ -340,12 +618,15 @@ def admin_kyc_review_view(request, kyc_id):
         user = kyc.portfolio.user
 
         if action == "approve":
+            previous_status = kyc.status
             kyc.status = KYC.STATUS_VERIFIED
             kyc.reviewed_at = timezone.now()
             kyc.rejection_reason = ""
             kyc.save()
+            audit.record(request, "kyc.approve", kyc,
+                         {"status": [previous_status, kyc.status]}, target_repr=user.email)
             try:
-                send_html_email(
+                queue_html_email(
                     subject="Your Identity Verification Has Been Approved",
                     to_email=[user.email],
                     template_name="notification/emails/kyc_approved.html",
@@ -371,13 +652,17 @@ def admin_kyc_review_view(request, kyc_id):
             if not reason:
                 messages.error(request, "Rejection reason is required.")
             else:
+                previous_status = kyc.status
                 kyc.status = KYC.STATUS_REJECTED
                 kyc.reviewed_at = timezone.now()
                 kyc.rejection_reason = reason
                 kyc.save()
+                audit.record(request, "kyc.reject", kyc,
+                             {"status": [previous_status, kyc.status], "rejection_reason": [None, reason]},
+                             target_repr=user.email)
 
                 try:
-                    send_html_email(
+                    queue_html_email(
                         subject="Update on Your Verification Request",
                         to_email=[user.email],
                         template_name="notification/emails/kyc_rejected.html",
@@ -410,8 +695,11 @@ def admin_kyc_review_view(request, kyc_id):
 @admin_staff_only
 def snapshot_positive_view(request, order_id):
     order = get_object_or_404(OrderPlan, pk=order_id)
+    before = order.current_value
     item = create_manual_snapshot(order_id, order.yield_percent,
                                   actor=request.user, reason="Staff positive toggle")
+    audit.record(request, "snapshot.positive", order,
+                 {"current_value": [str(before), str(item.cumulative_amount)]})
     messages.success(request, f"Positive snapshot created for {order.plan.name}: + ${item.delta_amount} gain added to the current value")
     return redirect('staff:admin_customer_detail', user_id=order.portfolio.user.id)
 
@@ -421,8 +709,11 @@ def snapshot_positive_view(request, order_id):
 def snapshot_negative_view(request, order_id):
     order = get_object_or_404(OrderPlan, pk=order_id)
     percent = order.yield_percent * Decimal('-1')
+    before = order.current_value
     item = create_manual_snapshot(order_id, percent,
                                   actor=request.user, reason="Staff negative toggle")
+    audit.record(request, "snapshot.negative", order,
+                 {"current_value": [str(before), str(item.cumulative_amount)]})
     messages.success(request, f"Negative snapshot created for {order.plan.name}: - ${item.delta_amount} remopved from the current value")
     return redirect('staff:admin_customer_detail', user_id=order.portfolio.user.id)
 
@@ -440,13 +731,19 @@ def vip_request_action(request, request_id, action):
     vip_request = get_object_or_404(VIPRequest, id=request_id)
     
     if action == "approve":
-        if approve_vip_request(vip_request):
+        if approve_vip_request(vip_request.pk):
+            audit.record(request, "vip.approve", vip_request,
+                         {"status": [VIPRequest.PENDING, VIPRequest.APPROVED]},
+                         target_repr=vip_request.user.email)
             messages.success(request, f"{vip_request.user.email} has been approved as VIP.")
         else:
             messages.error(request, "Cannot approve this request.")
     elif action == "reject":
         note = request.POST.get("admin_note")
-        if reject_vip_request(vip_request, note):
+        if reject_vip_request(vip_request.pk, note):
+            audit.record(request, "vip.reject", vip_request,
+                         {"status": [VIPRequest.PENDING, VIPRequest.REJECTED], "admin_note": [None, note]},
+                         target_repr=vip_request.user.email)
             messages.success(request, f"{vip_request.user.email}'s VIP request was rejected.")
         else:
             messages.error(request, "Cannot reject this request.")
@@ -577,6 +874,8 @@ def toggle_user_otp_view(request, user_id):
 
     user.otp_enabled = not user.otp_enabled
     user.save(update_fields=['otp_enabled'])
+    audit.record(request, "user.otp_toggle", user,
+                 {"otp_enabled": [not user.otp_enabled, user.otp_enabled]}, target_repr=user.email)
 
     if user.otp_enabled:
         messages.success(
@@ -599,6 +898,9 @@ def toggle_email_verification_view(request, user_id):
 
     user.is_email_verified = not user.is_email_verified
     user.save(update_fields=["is_email_verified"])
+    audit.record(request, "user.email_verification_toggle", user,
+                 {"is_email_verified": [not user.is_email_verified, user.is_email_verified]},
+                 target_repr=user.email)
 
     messages.success(
         request,
@@ -608,7 +910,6 @@ def toggle_email_verification_view(request, user_id):
     return redirect('staff:admin_customer_detail', user_id=user.pk)
 
 
-@transaction.atomic
 def transaction_create_view(request):
     if request.method == "POST":
         form = StaffTransactionForm(request.POST)
@@ -624,31 +925,21 @@ def transaction_create_view(request):
             elif action == "debit":
                 trx.transaction_type = "WITHDRAW"
 
-            portfolio = trx.portfolio
-
-            if trx.transaction_type == "DEPOSIT":
-                portfolio.cash_balance += trx.amount
-
-            elif trx.transaction_type == "WITHDRAW":
-
-                if portfolio.cash_balance < trx.amount:
-                    form.add_error(
-                        "amount",
-                        "Insufficient customer balance."
-                    )
-                    return render(
-                        request,
-                        "staff/transaction_form.html",
-                        {"form": form},
-                    )
-
-                portfolio.cash_balance -= trx.amount
-
-            portfolio.save()
-
-            trx.balance = portfolio.cash_balance
-            trx.save()
+            try:
+                post_staff_transaction(trx)
+            except ValidationError as e:
+                form.add_error("amount", e)
+                return render(
+                    request,
+                    "staff/transaction_form.html",
+                    {"form": form},
+                )
 
+            audit.record(
+                request, "transaction.create", trx,
+                {"type": [None, trx.transaction_type], "amount": [None, str(trx.amount)]},
+                target_repr=f"{trx.transaction_type} {trx.amount} on portfolio #{trx.portfolio_id}",
+            )
             messages.success(request, "Transaction saved successfully.")
 
             return redirect("staff:admin_transaction_create")
@@ -663,16 +954,159 @@ def transaction_create_view(request):
     )
 
 
+PORTFOLIO_SEARCH_LIMIT = 10
+
+
+@login_required
+@admin_staff_only
+def portfolio_search_view(request):
+    """
+    Prefix search on customer email / name for the portfolio picker.
+    Both lookups hit the Upper() indexes on User.
+    """
+    term = request.GET.get("q", "").strip()
+
+    if len(term) < 2:
+        return JsonResponse({"results": []})
+
+    portfolios = (
+        Portfolio.objects
+        .filter(
+            Q(user__email__istartswith=term) |
+            Q(user__full_name__istartswith=term),
+            user__deleted_at__isnull=True,
+        )
+        .order_by("user__email")
+        .values("id", "user__email", "user__full_name", "cash_balance")
+        [:PORTFOLIO_SEARCH_LIMIT]
+    )
+
+    results = [
+        {
+            "id": p["id"],
+            "email": p["user__email"],
+            "full_name": p["user__full_name"],
+            "cash_balance": str(p["cash_balance"]),
+        }
+        for p in portfolios
+    ]
+    return JsonResponse({"results": results})
+
+
+@login_required
+@admin_staff_only
+def transaction_import_view(request):
+    if request.method == "POST":
+        form = TransactionImportForm(request.POST, request.FILES)
+
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+
+            try:
+                job = import_transactions(upload.file, upload.name, actor=request.user)
+            except Exception as e:
+                print("Transaction import failed:", e)
+                traceback.print_exc()
+                messages.error(request, "The import stopped unexpectedly. Check the import log below.")
+                return redirect("staff:admin_transaction_import")
+
+            audit.record(
+                request, "transaction.import", job,
+                {"imported_rows": [None, job.imported_rows], "failed_rows": [None, job.failed_rows]},
+                target_repr=job.file_name,
+            )
+
+            if job.failed_rows:
+                messages.warning(
+                    request,
+                    f"Imported {job.imported_rows} of {job.total_rows} rows. "
+                    f"{job.failed_rows} rows were rejected; download the error report for details."
+                )
+            else:
+                messages.success(request, f"Imported {job.imported_rows} transactions.")
+
+            return redirect("staff:admin_transaction_import")
+    else:
+        form = TransactionImportForm()
+
+    context = {
+        "current_url": request.resolver_match.url_name,
+        "form": form,
+        "imports": TransactionImport.objects.select_related("created_by")[:20],
+    }
+    return render(request, "staff/transaction_import.html", context)
+
+
+@login_required
+@admin_staff_only
+def transaction_import_errors_view(request, pk):
+    job = get_object_or_404(TransactionImport, pk=pk)
+
+    response = HttpResponse(job.error_report, content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="import-{job.pk}-errors.csv"'
+    return response
+
+
+@login_required
+@admin_staff_only
+def email_outbox_view(request):
+    """
+    Dead-letter queue: emails that ran out of delivery attempts.
+    Staff can requeue selected ones (or all) or discard them.
+    """
+    if request.method == "POST":
+        action = request.POST.get("action")
+        ids = [i for i in request.POST.getlist("email_ids") if i.isdigit()]
+        dead = EmailOutbox.objects.filter(status=EmailOutbox.STATUS_DEAD)
+
+        if action == "retry_all":
+            count = requeue_dead()
+            messages.success(request, f"{count} emails queued for another attempt.")
+        elif not ids:
+            messages.error(request, "Select at least one email.")
+        elif action == "retry":
+            count = requeue_dead(ids)
+            messages.success(request, f"{count} emails queued for another attempt.")
+        elif action == "discard":
+            count, _ = dead.filter(pk__in=ids).delete()
+            messages.success(request, f"{count} emails discarded.")
+        else:
+            messages.error(request, "Invalid action.")
+
+        return redirect("staff:admin_email_outbox")
+
+    dead_emails = (
+        EmailOutbox.objects
+        .filter(status=EmailOutbox.STATUS_DEAD)
+        .order_by("-created_at")
+        .only("id", "subject", "to_email", "template_name", "attempts", "last_error", "created_at")
+    )
+    paginator = Paginator(dead_emails, 25)
+
+    context = {
+        "current_url": request.resolver_match.url_name,
+        "dead_emails": paginator.get_page(request.GET.get("page")),
+        "pending_count": EmailOutbox.objects.filter(status=EmailOutbox.STATUS_PENDING).count(),
+        "circuit_open": circuit_is_open(),
+    }
+    return render(request, "staff/email_outbox.html", context)
+
+
 @login_required
 @admin_staff_only
 def order_plan_update_view(request, pk):
     order_plan = get_object_or_404(OrderPlan, pk=pk)
 
     if request.method == "POST":
+        before = audit.snapshot(order_plan, OrderPlanUpdateForm.Meta.fields)
         form = OrderPlanUpdateForm(request.POST, instance=order_plan)
 
         if form.is_valid():
             form.save()
+            audit.record(
+                request, "order_plan.update", order_plan,
+                audit.diff(before, audit.snapshot(order_plan, OrderPlanUpdateForm.Meta.fields)),
+            )
             messages.success(request, "Strategy Yield updated successfully.")
             return redirect(
                 "staff:admin_customer_detail",
@@ -688,4 +1122,104 @@ def order_plan_update_view(request, pk):
         "current_url": request.resolver_match.url_name,
     }
 
-    return render(request, "staff/order_plan_form.html", context)
\ No newline at end of file
+    return render(request, "staff/order_plan_form.html", context)
+
+@login_required
+@admin_staff_only
+def analytics_view(request):
+    # reads only the rollup tables; see staff/analytics.py
+    context = {
+        "current_url": request.resolver_match.url_name,
+        **analytics_summary(),
+    }
+    return render(request, 'staff/analytics.html', context)
+
+
+@login_required
+@admin_staff_only
+def customer_deletions_view(request):
+    if request.method == "POST":
+        job_id = request.POST.get("job_id", "")
+        if job_id.isdigit() and retry_deletion_job(int(job_id)):
+            messages.success(request, "Deletion queued again; it resumes where it stopped.")
+        else:
+            messages.error(request, "That deletion cannot be retried.")
+        return redirect("staff:admin_customer_deletions")
+
+    jobs = Paginator(
+        CustomerDeletionJob.objects.select_related('requested_by'),
+        25,
+    ).get_page(request.GET.get("page"))
+
+    context = {
+        "current_url": request.resolver_match.url_name,
+        "jobs": jobs,
+    }
+    return render(request, 'staff/customer_deletions.html', context)
+
+
+AUDIT_PAGE_SIZE = 50
+
+
+def _parse_day(value):
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+@login_required
+@admin_staff_only
+def audit_log_view(request):
+    filters = {
+        "action": request.GET.get("action", ""),
+        "actor": request.GET.get("actor", ""),
+        "target_type": request.GET.get("target_type", "").strip(),
+        "target_id": request.GET.get("target_id", "").strip(),
+        "date_from": request.GET.get("date_from", ""),
+        "date_to": request.GET.get("date_to", ""),
+    }
+
+    entries = AuditLog.objects.all()
+    if filters["action"]:
+        entries = entries.filter(action=filters["action"])
+    if filters["actor"].isdigit():
+        entries = entries.filter(actor_id=filters["actor"])
+    if filters["target_type"]:
+        entries = entries.filter(target_type=filters["target_type"])
+    if filters["target_id"]:
+        entries = entries.filter(target_id=filters["target_id"])
+    # whole days, as ranges on created_at so the indexes still apply
+    date_from = _parse_day(filters["date_from"])
+    date_to = _parse_day(filters["date_to"])
+    if date_from:
+        entries = entries.filter(
+            created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min))
+        )
+    if date_to:
+        entries = entries.filter(
+            created_at__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        )
+
+    try:
+        page = keyset_page(
+            entries,
+            ("-created_at", "-pk"),
+            cursor=request.GET.get("cursor"),
+            page_size=AUDIT_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        page = keyset_page(entries, ("-created_at", "-pk"), page_size=AUDIT_PAGE_SIZE)
+
+    query = request.GET.copy()
+    query.pop("cursor", None)
+
+    context = {
+        "current_url": request.resolver_match.url_name,
+        "entries": page,
+        "filters": filters,
+        "query": query.urlencode(),
+        "action_choices": AuditLog.ACTION_CHOICES,
+        "staff_users": User.objects.filter(is_staff=True).order_by("email").only("id", "email"),
+    }
+    return render(request, 'staff/audit_log.html', context)
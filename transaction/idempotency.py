@@ -0,0 +1,88 @@
+import secrets
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.shortcuts import redirect
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_FIELD = "idempotency_key"
+
+
+def new_idempotency_key():
+    return secrets.token_urlsafe(24)
+
+
+def _key_cutoff():
+    ttl = getattr(settings, "IDEMPOTENCY_KEY_TTL_MINUTES", 24 * 60)
+    return timezone.now() - timedelta(minutes=ttl)
+
+
+def _claim(user, key, path):
+    """
+    Insert the key. Returns (record, created); an expired record holding
+    the same key is replaced.
+    """
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, path=path), True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is not None and record.created_at < _key_cutoff():
+        record.delete()
+        return _claim(user, key, path)
+    return record, False
+
+
+def idempotent_post(view_func):
+    """
+    Make a form POST safe to repeat.
+
+    The form carries a one-time key ({% idempotency_key_field %}). The
+    first POST with a key runs the view and records its redirect; any
+    later POST with the same key gets that redirect back without running
+    the view again. Responses that re-render the form (validation errors)
+    are not recorded, so the user can correct and resubmit.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        key = request.POST.get(IDEMPOTENCY_FIELD, "")[:64] if request.method == "POST" else ""
+        if not key or not request.user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+
+        record, created = _claim(request.user, key, request.path)
+        if not created:
+            if record is None or record.response_status is None:
+                messages.info(request, "Your previous request is still being processed.")
+                return redirect(request.path)
+
+            messages.info(request, "This request has already been submitted.")
+            return redirect(record.response_location)
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code in (301, 302, 303) and response.has_header("Location"):
+            record.response_status = response.status_code
+            record.response_location = response["Location"]
+            record.save(update_fields=["response_status", "response_location"])
+        else:
+            record.delete()
+
+        return response
+    return _wrapped_view
+
+
+def purge_expired_keys():
+    """Delete keys past their TTL. Returns the number of rows removed."""
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=_key_cutoff()).delete()
+    return deleted
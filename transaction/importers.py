@@ -0,0 +1,277 @@
+"""
+Bulk import of staff-created transactions from CSV or JSONL.
+
+Each row funds or debits one portfolio:
+
+    email or portfolio_id, action (fund/debit), amount,
+    and optionally currency, payment_method, status, timestamp, note
+
+Rows are streamed and validated, grouped per portfolio and applied in
+chunked transactions: one bulk insert for the transactions and one
+balance update per portfolio.
+A row moves the balance only as its status implies (see
+``staff.services.balance_change``), so an imported PENDING deposit is
+credited when staff approve it, not at import.
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from base.db import atomic_retry
+from customer.models import Portfolio
+from staff.analytics import mark_flow_days_dirty
+from staff.services import balance_change
+from .models import Transaction, TransactionImport
+
+ACTIONS = {
+    "fund": "DEPOSIT",
+    "deposit": "DEPOSIT",
+    "debit": "WITHDRAW",
+    "withdraw": "WITHDRAW",
+}
+CURRENCIES = {code for code, _ in Transaction.CURRENCY_CHOICES}
+PAYMENT_METHODS = {code for code, _ in Transaction.PAYMENT_METHODS}
+STATUSES = {code for code, _ in Transaction.STATUS_CHOICES}
+
+PORTFOLIOS_PER_CHUNK = 200
+LOOKUP_BATCH = 1000
+
+
+def _column_max(model, field_name):
+    """Largest value a DecimalField column can store."""
+    field = model._meta.get_field(field_name)
+    return Decimal(10) ** (field.max_digits - field.decimal_places) - Decimal(10) ** -field.decimal_places
+
+
+# checked before anything is written, so an out-of-range value is a row
+# error instead of a database error halfway through the import
+MAX_AMOUNT = _column_max(Transaction, "amount")
+MAX_BALANCE = min(_column_max(Transaction, "balance"), _column_max(Portfolio, "cash_balance"))
+
+
+class RowError(Exception):
+    pass
+
+
+def iter_rows(fileobj, file_name):
+    """Yield (line_number, dict) from an uploaded CSV or JSONL file."""
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+
+    if file_name.lower().endswith((".jsonl", ".ndjson")):
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_number, None
+                continue
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        reader = csv.DictReader(text)
+        for row in reader:
+            # header is line 1
+            yield reader.line_num, row
+
+
+def parse_row(row):
+    """Validate one raw row. Returns a dict of clean values or raises RowError."""
+    if row is None:
+        raise RowError("Malformed row.")
+
+    def value(name):
+        return str(row.get(name) or "").strip()
+
+    transaction_type = ACTIONS.get(value("action").lower())
+    if transaction_type is None:
+        raise RowError("action must be 'fund' or 'debit'.")
+
+    try:
+        amount = Decimal(value("amount"))
+    except InvalidOperation:
+        raise RowError("amount is not a number.")
+    if not amount.is_finite():
+        raise RowError("amount is not a number.")
+    if amount > MAX_AMOUNT:
+        raise RowError(f"amount must not be more than {MAX_AMOUNT}.")
+    amount = amount.quantize(Decimal("0.01"))
+    if amount <= 0:
+        raise RowError("amount must be greater than zero.")
+
+    currency = value("currency").upper() or None
+    if currency and currency not in CURRENCIES:
+        raise RowError(f"Unknown currency '{currency}'.")
+
+    payment_method = value("payment_method").upper() or None
+    if payment_method and payment_method not in PAYMENT_METHODS:
+        raise RowError(f"Unknown payment_method '{payment_method}'.")
+
+    status = value("status").upper() or "SUCCESSFUL"
+    if status not in STATUSES:
+        raise RowError(f"Unknown status '{status}'.")
+
+    timestamp = timezone.now()
+    if value("timestamp"):
+        try:
+            timestamp = parse_datetime(value("timestamp"))
+        except ValueError:
+            # well-formed but impossible, e.g. month 13
+            timestamp = None
+        if timestamp is None:
+            raise RowError("timestamp must be ISO 8601 (YYYY-MM-DD HH:MM[:SS]).")
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp)
+
+    portfolio_id = value("portfolio_id")
+    email = value("email")
+    if portfolio_id and not portfolio_id.isdigit():
+        raise RowError("portfolio_id must be a number.")
+    if not portfolio_id and not email:
+        raise RowError("Either email or portfolio_id is required.")
+
+    return {
+        "portfolio_id": int(portfolio_id) if portfolio_id else None,
+        "email": email,
+        "transaction_type": transaction_type,
+        "amount": amount,
+        "currency": currency,
+        "payment_method": payment_method,
+        "status": status,
+        "timestamp": timestamp,
+        "note": value("note"),
+    }
+
+
+def _resolve_portfolios(rows):
+    """Map each row to an existing portfolio id in batched lookups."""
+    emails = {row["email"] for _, row in rows if not row["portfolio_id"]}
+    ids = {row["portfolio_id"] for _, row in rows if row["portfolio_id"]}
+
+    by_email = {}
+    emails = list(emails)
+    for start in range(0, len(emails), LOOKUP_BATCH):
+        by_email.update(
+            Portfolio.objects
+            .filter(user__email__in=emails[start:start + LOOKUP_BATCH])
+            .values_list("user__email", "id")
+        )
+
+    existing = set()
+    ids = list(ids)
+    for start in range(0, len(ids), LOOKUP_BATCH):
+        existing.update(
+            Portfolio.objects
+            .filter(pk__in=ids[start:start + LOOKUP_BATCH])
+            .values_list("id", flat=True)
+        )
+
+    return by_email, existing
+
+
+@atomic_retry
+def _apply_chunk(groups):
+    """
+    Apply rows for a chunk of portfolios. ``groups`` is a list of
+    (portfolio_id, [(line_number, row), ...]) in file order.
+    Returns (imported_count, [(line_number, error), ...]).
+    """
+    portfolios = Portfolio.objects.select_for_update().in_bulk(
+        [portfolio_id for portfolio_id, _ in groups]
+    )
+    new_transactions = []
+    errors = []
+
+    for portfolio_id, rows in groups:
+        portfolio = portfolios[portfolio_id]
+        balance = portfolio.cash_balance
+
+        for line_number, row in rows:
+            # same balance effect as a staff-created transaction in this status
+            change = balance_change(row["transaction_type"], row["status"], row["amount"])
+            if balance + change < 0:
+                errors.append((line_number, "Insufficient customer balance."))
+                continue
+            if balance + change > MAX_BALANCE:
+                errors.append((line_number, "Customer balance would exceed the maximum allowed."))
+                continue
+            balance += change
+
+            new_transactions.append(Transaction(
+                portfolio_id=portfolio_id,
+                transaction_type=row["transaction_type"],
+                amount=row["amount"],
+                balance=balance,
+                currency=row["currency"],
+                payment_method=row["payment_method"],
+                status=row["status"],
+                timestamp=row["timestamp"],
+                note=row["note"],
+            ))
+
+        portfolio.cash_balance = balance
+
+    Transaction.objects.bulk_create(new_transactions, batch_size=1000)
+    Portfolio.objects.bulk_update(portfolios.values(), ["cash_balance"], batch_size=1000)
+    # backdated rows fall outside the days refresh_rollups recomputes
+    mark_flow_days_dirty(trx.timestamp for trx in new_transactions)
+    return len(new_transactions), errors
+
+
+def import_transactions(fileobj, file_name, actor=None):
+    """
+    Run a full import and return the finished TransactionImport record.
+    """
+    job = TransactionImport.objects.create(file_name=file_name, created_by=actor)
+    errors = []
+    valid_rows = []
+
+    try:
+        for line_number, raw in iter_rows(fileobj, file_name):
+            job.total_rows += 1
+            try:
+                valid_rows.append((line_number, parse_row(raw)))
+            except RowError as e:
+                errors.append((line_number, str(e)))
+
+        by_email, existing = _resolve_portfolios(valid_rows)
+
+        grouped = {}
+        for line_number, row in valid_rows:
+            portfolio_id = row["portfolio_id"] or by_email.get(row["email"])
+            if portfolio_id is None or (row["portfolio_id"] and portfolio_id not in existing):
+                errors.append((line_number, "Customer portfolio not found."))
+                continue
+            grouped.setdefault(portfolio_id, []).append((line_number, row))
+
+        groups = list(grouped.items())
+        for start in range(0, len(groups), PORTFOLIOS_PER_CHUNK):
+            imported, chunk_errors = _apply_chunk(groups[start:start + PORTFOLIOS_PER_CHUNK])
+            job.imported_rows += imported
+            errors.extend(chunk_errors)
+
+        job.status = TransactionImport.STATUS_COMPLETED
+    except Exception as e:
+        job.status = TransactionImport.STATUS_FAILED
+        errors.append(("", f"Import stopped: {e}"))
+        raise
+    finally:
+        job.failed_rows = sum(1 for line_number, _ in errors if line_number != "")
+        job.error_report = _error_csv(errors)
+        job.finished_at = timezone.now()
+        job.save()
+
+    return job
+
+
+def _error_csv(errors):
+    if not errors:
+        return ""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["line", "error"])
+    writer.writerows(sorted(errors, key=lambda e: (e[0] == "", e[0] or 0)))
+    return out.getvalue()
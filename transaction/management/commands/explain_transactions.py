@@ -0,0 +1,98 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from transaction.models import Transaction
+
+TABLE = Transaction._meta.db_table
+
+
+def hot_queries(portfolio_id):
+    """The Transaction querysets behind the customer and staff pages."""
+    return {
+        "customer deposit history": Transaction.objects.filter(
+            portfolio_id=portfolio_id, transaction_type='DEPOSIT'
+        ),
+        "customer wallet history": Transaction.objects.filter(
+            portfolio_id=portfolio_id
+        ),
+        "pending withdrawal sum": Transaction.objects.filter(
+            portfolio_id=portfolio_id, transaction_type='WITHDRAW', status='PENDING'
+        ).order_by().values('amount'),
+        "staff pending deposits": Transaction.objects.filter(
+            transaction_type='DEPOSIT', status='PENDING'
+        ).order_by('-timestamp'),
+        "staff pending withdrawals": Transaction.objects.filter(
+            transaction_type='WITHDRAW', status='PENDING'
+        ).order_by('-timestamp'),
+    }
+
+
+def is_full_scan(plan):
+    """
+    Detect a full scan of the transaction table in CockroachDB, PostgreSQL
+    or SQLite EXPLAIN output.
+    """
+    if re.search(rf"Seq Scan on {TABLE}\b", plan):
+        return True
+    if re.search(rf"\bSCAN {TABLE}\b(?! USING)", plan):
+        return True
+
+    # CockroachDB prints the table and its spans on separate lines
+    current_table = None
+    for line in plan.splitlines():
+        match = re.search(r"table: (\w+)@", line)
+        if match:
+            current_table = match.group(1)
+        elif "FULL SCAN" in line and current_table == TABLE:
+            return True
+    return False
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the hot Transaction queries and fail if any of them full-scans "
+        "the table. Run against a database with production-like statistics."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--portfolio",
+            type=int,
+            help="Portfolio id used for the per-customer queries (default: any).",
+        )
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Print every plan, not only the failing ones.",
+        )
+
+    def handle(self, *args, **options):
+        portfolio_id = options["portfolio"]
+        if portfolio_id is None:
+            portfolio_id = (
+                Transaction.objects.order_by().values_list("portfolio_id", flat=True).first()
+                or 1
+            )
+
+        self.stdout.write(f"Database: {connection.display_name}, portfolio {portfolio_id}")
+
+        failures = []
+        for name, queryset in hot_queries(portfolio_id).items():
+            plan = queryset.explain()
+            full_scan = is_full_scan(plan)
+
+            if full_scan:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"FULL SCAN  {name}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"index scan {name}"))
+
+            if full_scan or options["verbose_plans"]:
+                self.stdout.write(plan + "\n")
+
+        if failures:
+            raise CommandError(
+                "Full table scan in: " + ", ".join(failures)
+            )
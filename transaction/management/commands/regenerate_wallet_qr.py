@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from transaction.models import Wallet
+
+
+def _render_and_upload(wallet):
+    # runs in a worker thread: rendering and the storage upload only, the
+    # row itself is written from the main thread
+    name = wallet.qr_code.field.generate_filename(wallet, f"{wallet.coin.symbol}_qr.png")
+    return wallet.qr_code.storage.save(name, wallet.render_qr())
+
+
+class Command(BaseCommand):
+    help = (
+        "Render and upload wallet QR codes that are missing or out of date "
+        "with their address, several at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate every wallet's QR code, current or not.",
+        )
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        wallets = list(Wallet.objects.select_related("coin").order_by("pk"))
+        if not options["force"]:
+            wallets = [wallet for wallet in wallets if not wallet.qr_is_current]
+
+        failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = [(wallet, pool.submit(_render_and_upload, wallet)) for wallet in wallets]
+            for wallet, future in futures:
+                try:
+                    name = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{wallet}: {e}")
+                    continue
+                # only if the address is still the one that was rendered
+                Wallet.objects.filter(
+                    pk=wallet.pk, wallet_address=wallet.wallet_address
+                ).update(qr_code=name, qr_hash=Wallet.address_hash(wallet.wallet_address))
+
+        self.stdout.write(
+            f"Regenerated {len(wallets) - failed} wallet QR codes ({failed} failed)"
+        )
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-19 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transaction', '0010_alter_transaction_timestamp'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['portfolio', '-timestamp'], name='trx_portfolio_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['portfolio', 'transaction_type', '-timestamp'], name='trx_portfolio_type_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['portfolio', 'transaction_type'], name='trx_portfolio_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['transaction_type', '-timestamp'], name='trx_type_pending_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transaction', '0013_transactionimport'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['timestamp'], name='trx_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transaction', '0014_transaction_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='qr_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
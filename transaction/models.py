@@ -1,8 +1,9 @@
+from django.conf import settings
 from django.db import models
 from decimal import Decimal
-import qrcode
+import hashlib
 from io import BytesIO
-from django.core.files import File
+from django.core.files.base import ContentFile
 from django.utils import timezone
 
 class Coin(models.Model):
@@ -31,18 +32,33 @@ class Wallet(models.Model):
         null=True
     )
 
-    def save(self, *args, **kwargs):
+    # sha256 of the wallet_address qr_code was rendered from
+    qr_hash = models.CharField(max_length=64, blank=True, default="")
 
-        qr = qrcode.make(self.wallet_address)
+    @staticmethod
+    def address_hash(address):
+        return hashlib.sha256(address.encode()).hexdigest()
 
-        buffer = BytesIO()
-        qr.save(buffer, format="PNG")
+    @property
+    def qr_is_current(self):
+        return bool(self.qr_code) and self.qr_hash == self.address_hash(self.wallet_address)
 
-        buffer.seek(0)  # VERY IMPORTANT
+    def render_qr(self):
+        """PNG of the wallet address as a ContentFile."""
+        # imported here so loading the models doesn't pull in qrcode
+        import qrcode
 
-        filename = f"{self.coin.symbol}_qr.png"
+        buffer = BytesIO()
+        qrcode.make(self.wallet_address).save(buffer, format="PNG")
+        return ContentFile(buffer.getvalue())
 
-        self.qr_code.save(filename, File(buffer), save=False)
+    def save(self, *args, **kwargs):
+        # only re-render and re-upload the QR code when the address changed
+        if not self.qr_is_current:
+            self.qr_code.save(f"{self.coin.symbol}_qr.png", self.render_qr(), save=False)
+            self.qr_hash = self.address_hash(self.wallet_address)
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "qr_code", "qr_hash"}
 
         super().save(*args, **kwargs)
 
@@ -150,6 +166,84 @@ class Transaction(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # customer history / wallet pages
+            models.Index(fields=['portfolio', '-timestamp'], name='trx_portfolio_ts_idx'),
+            models.Index(
+                fields=['portfolio', 'transaction_type', '-timestamp'],
+                name='trx_portfolio_type_ts_idx',
+            ),
+            # pending withdrawal sums per portfolio
+            models.Index(
+                fields=['portfolio', 'transaction_type'],
+                name='trx_portfolio_pending_idx',
+                condition=models.Q(status='PENDING'),
+            ),
+            # daily analytics rollups (staff/analytics.py)
+            models.Index(fields=['timestamp'], name='trx_timestamp_idx'),
+            # staff pending deposit / withdrawal queues
+            models.Index(
+                fields=['transaction_type', '-timestamp'],
+                name='trx_type_pending_ts_idx',
+                condition=models.Q(status='PENDING'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction_type} - {self.payment_method} - {self.amount} ({self.status})"
+
+class IdempotencyKey(models.Model):
+    """
+    First response to a money-moving POST, keyed by the one-time token
+    rendered into the form. Replayed when the same form is submitted again.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys"
+    )
+    key = models.CharField(max_length=64)
+    path = models.CharField(max_length=255)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_location = models.CharField(max_length=500, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return f"{self.user_id} {self.path} ({self.key})"
+
+
+class TransactionImport(models.Model):
+    STATUS_PROCESSING = 'processing'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    file_name = models.CharField(max_length=255)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PROCESSING)
+    total_rows = models.PositiveIntegerField(default=0)
+    imported_rows = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+    # CSV of "line,error" for every rejected row
+    error_report = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
 
     def __str__(self):
-        return f"{self.transaction_type} - {self.payment_method} - {self.amount} ({self.status})"
\ No newline at end of file
+        return f"Import {self.file_name} ({self.status})"
@@ -0,0 +1,16 @@
+from django import template
+from django.utils.html import format_html
+
+from transaction.idempotency import IDEMPOTENCY_FIELD, new_idempotency_key
+
+register = template.Library()
+
+
+@register.simple_tag
+def idempotency_key_field():
+    """Hidden one-time key for forms handled by an @idempotent_post view."""
+    return format_html(
+        '<input type="hidden" name="{}" value="{}">',
+        IDEMPOTENCY_FIELD,
+        new_idempotency_key(),
+    )